@@ -0,0 +1,316 @@
+"""Reaction firehose benchmark of the Karma cog.
+
+Feeds synthetic reaction events into ``Karma.on_raw_reaction_add`` and
+``Karma.on_raw_reaction_remove`` through a fake bot and a fake message
+source, backed by a temporary SQLite database, and reports throughput,
+handler latency, event loop lag, flush duration and database queries
+per thousand events.
+
+Run it from the root of the bot, so the ``pie`` package can be imported::
+
+    python -m modules.boards.karma.benchmark --events 20000 --guilds 1 10 100
+
+Every combination of ``--guilds``, ``--emoji-mix`` and ``--toggle-ratio``
+is one scenario with a fresh database.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+# The database has to be configured before pie is imported
+_tmpdir = tempfile.mkdtemp(prefix="karma-benchmark-")
+os.environ["DB_STRING"] = "sqlite:///" + os.path.join(_tmpdir, "benchmark.db")
+
+from sqlalchemy import event  # noqa: E402
+
+import discord  # noqa: E402
+
+from pie.database import database  # noqa: E402
+
+from . import module as karma_module  # noqa: E402
+from .module import Karma  # noqa: E402
+
+# Emojis with karma value, zero-value emojis are not in the emoji table
+KARMA_EMOJIS: Dict[str, int] = {"👍": 1, "❤️": 1, "🔥": 1, "👎": -1}
+NEUTRAL_EMOJIS: List[str] = ["🙂", "😂", "👀"]
+
+
+class FakeBot:
+    """Bot that is never ready, so the background loops of the cog stay idle."""
+
+    def __init__(self):
+        self.cogs: Dict[str, object] = {}
+        self._ready = asyncio.Event()
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    def get_channel(self, channel_id: int):
+        return None
+
+    async def wait_until_ready(self):
+        await self._ready.wait()
+
+
+class BenchmarkKarma(Karma):
+    """Karma cog with a fake message source and exact latency measurement."""
+
+    def __init__(self, bot: FakeBot, authors: Dict[int, int], fetch_latency: float):
+        super().__init__(bot)
+        self.authors: Dict[int, int] = authors
+        self.fetch_latency: float = fetch_latency
+        self.latencies: List[float] = []
+
+    async def _fetch_message_author(
+        self, reaction: discord.RawReactionActionEvent
+    ) -> Optional[int]:
+        if self.fetch_latency:
+            await asyncio.sleep(self.fetch_latency)
+        author_id: int = self.authors[reaction.message_id]
+        self.message_authors.add(reaction.message_id, author_id)
+        return author_id
+
+    async def _process_reaction(
+        self, reaction: discord.RawReactionActionEvent, added: bool
+    ):
+        start: float = time.perf_counter()
+        try:
+            await super()._process_reaction(reaction, added)
+        finally:
+            self.latencies.append((time.perf_counter() - start) * 1000)
+
+
+class QueryCounter:
+    """Count SQL statements sent to the database."""
+
+    def __init__(self):
+        self.count: int = 0
+        event.listen(database.db, "before_cursor_execute", self._count)
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+    def close(self):
+        event.remove(database.db, "before_cursor_execute", self._count)
+
+
+class LagMonitor:
+    """Measure how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval: float = interval
+        self.max_lag: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start: float = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag: float = time.perf_counter() - start - self.interval
+            self.max_lag = max(self.max_lag, lag * 1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+def make_event(
+    guild_id: int,
+    message_id: int,
+    user_id: int,
+    author_id: Optional[int],
+    emoji: str,
+    added: bool,
+) -> discord.RawReactionActionEvent:
+    data = {
+        "user_id": user_id,
+        "channel_id": guild_id * 10,
+        "message_id": message_id,
+        "guild_id": guild_id,
+        "type": 0,
+    }
+    if author_id is not None:
+        data["message_author_id"] = author_id
+    return discord.RawReactionActionEvent(
+        data=data,
+        emoji=discord.PartialEmoji(name=emoji),
+        event_type="REACTION_ADD" if added else "REACTION_REMOVE",
+    )
+
+
+def make_events(
+    count: int, guilds: int, emoji_mix: float, toggle_ratio: float, seed: int
+) -> Tuple[List[Tuple[discord.RawReactionActionEvent, bool]], Dict[int, int]]:
+    """Generate the reaction events.
+
+    :param count: Number of events
+    :param guilds: Number of guilds the events are spread over
+    :param emoji_mix: Share of reactions with emojis that have karma value
+    :param toggle_ratio: Share of added reactions that are removed right away
+    :param seed: Seed of the random generator
+
+    :return: List of (event, added) tuples and message to author mapping.
+    """
+    rng = random.Random(seed)
+    authors: Dict[int, int] = {}
+    events: List[Tuple[discord.RawReactionActionEvent, bool]] = []
+
+    while len(events) < count:
+        guild_id: int = rng.randrange(guilds) + 1
+        message_id: int = guild_id * 10_000_000 + rng.randrange(1_000)
+        author_id: int = authors.setdefault(
+            message_id, guild_id * 1_000_000 + rng.randrange(500)
+        )
+        user_id: int = guild_id * 1_000_000 + rng.randrange(500)
+        if rng.random() < emoji_mix:
+            emoji = rng.choice(list(KARMA_EMOJIS.keys()))
+        else:
+            emoji = rng.choice(NEUTRAL_EMOJIS)
+
+        events.append(
+            (make_event(guild_id, message_id, user_id, author_id, emoji, True), True)
+        )
+        if rng.random() < toggle_ratio:
+            # Discord does not send the author on removal
+            events.append(
+                (make_event(guild_id, message_id, user_id, None, emoji, False), False)
+            )
+
+    return events[:count], authors
+
+
+async def run_scenario(
+    *,
+    events: int,
+    guilds: int,
+    emoji_mix: float,
+    toggle_ratio: float,
+    debounce: float,
+    fetch_latency: float,
+    batch: int,
+    seed: int,
+) -> Dict[str, float]:
+    """Run one scenario on a fresh database.
+
+    :return: Measured numbers.
+    """
+    database.base.metadata.drop_all(database.db)
+    database.base.metadata.create_all(database.db)
+    karma_module.JOURNAL_PATH = os.path.join(_tmpdir, "karma.journal")
+    if os.path.exists(karma_module.JOURNAL_PATH):
+        os.remove(karma_module.JOURNAL_PATH)
+
+    reaction_events, authors = make_events(
+        events, guilds, emoji_mix, toggle_ratio, seed
+    )
+
+    cog = BenchmarkKarma(FakeBot(), authors, fetch_latency)
+    cog.debounce_window = debounce
+    for guild_id in range(1, guilds + 1):
+        for emoji, value in KARMA_EMOJIS.items():
+            cog._set_emoji_value(guild_id, emoji, value)
+
+    flushes: List[float] = []
+    queries = QueryCounter()
+    monitor = LagMonitor()
+    monitor.start()
+
+    start: float = time.perf_counter()
+    for i, (reaction, added) in enumerate(reaction_events, start=1):
+        if added:
+            await cog.on_raw_reaction_add(reaction)
+        else:
+            await cog.on_raw_reaction_remove(reaction)
+
+        if i % batch == 0:
+            await asyncio.sleep(0)
+            if cog._get_flush_reason() is not None:
+                flushes.append((await cog._karma_cache_save("benchmark")).duration)
+
+    # Wait for debounced and running reactions
+    while cog._pending_reactions or cog._reaction_tasks:
+        await asyncio.sleep(0.01)
+    if len(cog.karma_cache):
+        flushes.append((await cog._karma_cache_save("benchmark")).duration)
+    elapsed: float = time.perf_counter() - start
+
+    monitor.stop()
+    queries.close()
+    cog.cog_unload()
+    cog.journal.close()
+
+    latencies: List[float] = cog.latencies or [0.0]
+    quantiles: List[float] = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "events/s": events / elapsed,
+        "p50 ms": quantiles[49],
+        "p99 ms": quantiles[98],
+        "lag ms": monitor.max_lag,
+        "flushes": len(flushes),
+        "flush ms": max(flushes, default=0.0) * 1000,
+        "queries/1k": queries.count * 1000 / events,
+    }
+
+
+async def main(args: argparse.Namespace):
+    columns: List[str] = [
+        "events/s",
+        "p50 ms",
+        "p99 ms",
+        "lag ms",
+        "flushes",
+        "flush ms",
+        "queries/1k",
+    ]
+    print(
+        f"{'guilds':>6} {'mix':>5} {'toggle':>6} "
+        + " ".join(f"{column:>13}" for column in columns)
+    )
+
+    for guilds in args.guilds:
+        for emoji_mix in args.emoji_mix:
+            for toggle_ratio in args.toggle_ratio:
+                result = await run_scenario(
+                    events=args.events,
+                    guilds=guilds,
+                    emoji_mix=emoji_mix,
+                    toggle_ratio=toggle_ratio,
+                    debounce=args.debounce,
+                    fetch_latency=args.fetch_latency / 1000,
+                    batch=args.batch,
+                    seed=args.seed,
+                )
+                print(
+                    f"{guilds:>6} {emoji_mix:>5.2f} {toggle_ratio:>6.2f} "
+                    + " ".join(f"{result[column]:>13.2f}" for column in columns)
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--guilds", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--emoji-mix", type=float, nargs="+", default=[1.0, 0.5])
+    parser.add_argument("--toggle-ratio", type=float, nargs="+", default=[0.0, 0.5])
+    parser.add_argument(
+        "--debounce", type=float, default=0.05, help="Debounce window in seconds"
+    )
+    parser.add_argument(
+        "--fetch-latency",
+        type=float,
+        default=0.0,
+        help="Latency of the fake message fetch in milliseconds",
+    )
+    parser.add_argument(
+        "--batch", type=int, default=100, help="Events sent between event loop yields"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,494 @@
+from __future__ import annotations
+
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .database import BoardOrder, BoardType, KarmaMember
+
+
+class KarmaDelta:
+    """Karma changes of one member since the last flush."""
+
+    __slots__ = ("value", "given", "taken")
+
+    def __init__(self):
+        self.value: int = 0
+        self.given: int = 0
+        self.taken: int = 0
+
+    def is_zero(self) -> bool:
+        return self.value == 0 and self.given == 0 and self.taken == 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<KarmaDelta value='{self.value}' "
+            f"given='{self.given}' taken='{self.taken}'>"
+        )
+
+
+class FlushStats:
+    """Statistics of one karma cache flush."""
+
+    __slots__ = ("reason", "keys", "chunks", "duration", "finished")
+
+    def __init__(self, reason: str, keys: int, chunks: int, duration: float):
+        self.reason: str = reason
+        self.keys: int = keys
+        self.chunks: int = chunks
+        self.duration: float = duration
+        self.finished: float = time.time()
+
+    def __repr__(self) -> str:
+        return (
+            f"<FlushStats reason='{self.reason}' keys='{self.keys}' "
+            f"chunks='{self.chunks}' duration='{self.duration}'>"
+        )
+
+
+class KarmaCache:
+    """Accumulator of karma deltas waiting to be saved to the database.
+
+    Holds one :class:`KarmaDelta` per (guild_id, user_id) key. When the net
+    delta of a key returns to zero (e.g. a reaction was added and removed),
+    the key is dropped, so it is never flushed as a no-op write.
+
+    ``dirty_since`` is the monotonic time of the first change since the cache
+    was last emptied, or None if it is empty.
+    """
+
+    __slots__ = ("_deltas", "dirty_since")
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[int, int], KarmaDelta] = {}
+        self.dirty_since: Optional[float] = None
+
+    def add(self, key: Tuple[int, int], value: int = 0, given: int = 0, taken: int = 0):
+        """Add karma deltas to the key.
+
+        :param key: (guild_id, user_id) tuple
+        :param value: Karma value delta
+        :param given: Given karma delta
+        :param taken: Taken karma delta
+        """
+        delta = self._deltas.get(key)
+        if delta is None:
+            delta = self._deltas[key] = KarmaDelta()
+            if self.dirty_since is None:
+                self.dirty_since = time.monotonic()
+
+        delta.value += value
+        delta.given += given
+        delta.taken += taken
+
+        if delta.is_zero():
+            del self._deltas[key]
+
+    def pop_all(self) -> Dict[Tuple[int, int], Tuple[int, int, int]]:
+        """Empty the cache.
+
+        :return: Mapping of (guild_id, user_id) to (value, given, taken) deltas.
+        """
+        deltas, self._deltas = self._deltas, {}
+        self.dirty_since = None
+        return {
+            key: (delta.value, delta.given, delta.taken)
+            for key, delta in deltas.items()
+        }
+
+    def discard_guild(self, guild_id: int) -> int:
+        """Drop all deltas of the guild.
+
+        :param guild_id: ID of the guild
+        :return: Number of dropped keys.
+        """
+        keys = [key for key in self._deltas if key[0] == guild_id]
+        for key in keys:
+            del self._deltas[key]
+        if not self._deltas:
+            self.dirty_since = None
+        return len(keys)
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], Tuple[int, int, int]]]:
+        """Iterate over the deltas without emptying the cache.
+
+        :return: Iterator of ((guild_id, user_id), (value, given, taken)) tuples.
+        """
+        for key, delta in self._deltas.items():
+            yield key, (delta.value, delta.given, delta.taken)
+
+    def memory_size(self) -> int:
+        """Approximate memory used by the cache.
+
+        All entries have the same shape, so only one of them is measured.
+
+        :return: Size in bytes.
+        """
+        size = sys.getsizeof(self._deltas)
+        for key, delta in self._deltas.items():
+            entry = sys.getsizeof(key) + sum(sys.getsizeof(k) for k in key)
+            entry += sys.getsizeof(delta)
+            size += entry * len(self._deltas)
+            break
+        return size
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        return key in self._deltas
+
+
+class EmojiUsageCache:
+    """Counters of karma emoji reactions waiting to be saved to the database.
+
+    Uses (guild_id, emoji) tuple as key, where emoji is the emoji ID of custom
+    emojis or the emoji string of unicode emojis, and holds numbers of added
+    and removed reactions.
+    """
+
+    __slots__ = ("_counts",)
+
+    def __init__(self):
+        self._counts: Dict[Tuple[int, str], List[int]] = {}
+
+    def add(self, guild_id: int, emoji: Union[int, str], added: bool):
+        """Count the reaction.
+
+        :param guild_id: ID of the guild
+        :param emoji: Emoji ID or unicode emoji string
+        :param added: If the reaction was added or removed.
+        """
+        counts = self._counts.get((guild_id, str(emoji)))
+        if counts is None:
+            counts = self._counts[(guild_id, str(emoji))] = [0, 0]
+        counts[0 if added else 1] += 1
+
+    def pop_all(self) -> Dict[Tuple[int, str], Tuple[int, int]]:
+        """Empty the cache.
+
+        :return: Mapping of (guild_id, emoji) to (added, removed) counts.
+        """
+        counts, self._counts = self._counts, {}
+        return {key: (added, removed) for key, (added, removed) in counts.items()}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class KarmaRanking:
+    """Sorted values of one karma board in one guild.
+
+    Values are kept in a sorted array, so the position of a value is found
+    by binary search. Position of a value is the count of strictly greater
+    values plus one, which matches the ``COUNT(*) ... WHERE value > x``
+    queries of :class:`KarmaMember`.
+    """
+
+    __slots__ = ("_members", "_values")
+
+    def __init__(self, members: Iterable[Tuple[int, int]], typecode: str = "q"):
+        """Build the ranking.
+
+        :param members: Iterable of (user_id, value) tuples.
+        :param typecode: Array type code, ``d`` for boards of float values.
+        """
+        self._members: Dict[int, int] = dict(members)
+        self._values: array = array(typecode, sorted(self._members.values()))
+
+    def position(self, value: int) -> int:
+        """Get position of the value on the board.
+
+        :param value: Board value
+        :return: Position on the board, starting at 1.
+        """
+        return len(self._values) - bisect_right(self._values, value) + 1
+
+    def get(self, user_id: int) -> Optional[int]:
+        """Get board value of the member.
+
+        :param user_id: Discord ID of the member
+        :return: Board value or None if the member is not known.
+        """
+        return self._members.get(user_id)
+
+    def add(self, user_id: int, delta: int):
+        """Add delta to the board value of the member.
+
+        Unknown members are inserted with the value of the delta, the same
+        way the database creates them with zero values.
+
+        :param user_id: Discord ID of the member
+        :param delta: Board value delta
+        """
+        old_value: Optional[int] = self._members.get(user_id)
+        if old_value is not None:
+            if delta == 0:
+                return
+            del self._values[bisect_left(self._values, old_value)]
+            new_value = old_value + delta
+        else:
+            new_value = delta
+
+        self._members[user_id] = new_value
+        insort(self._values, new_value)
+
+    def remove(self, user_id: int):
+        """Remove the member from the board.
+
+        :param user_id: Discord ID of the member
+        """
+        old_value: Optional[int] = self._members.pop(user_id, None)
+        if old_value is not None:
+            del self._values[bisect_left(self._values, old_value)]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class KarmaRankings:
+    """Karma rankings of all boards, built lazily per guild and board."""
+
+    __slots__ = ("_rankings",)
+
+    def __init__(self):
+        self._rankings: Dict[Tuple[int, BoardType], KarmaRanking] = {}
+
+    def get(self, guild_id: int, board: BoardType) -> KarmaRanking:
+        """Get the ranking, load it from the database if it is not built yet.
+
+        :param guild_id: ID of the guild
+        :param board: Karma board
+        """
+        ranking = self._rankings.get((guild_id, board))
+        if ranking is None:
+            ranking = KarmaRanking(
+                KarmaMember.get_values(guild_id, board),
+                "d" if board == BoardType.score else "q",
+            )
+            self._rankings[(guild_id, board)] = ranking
+        return ranking
+
+    def position(self, guild_id: int, board: BoardType, value: int) -> int:
+        """Get position of the value on the board.
+
+        :param guild_id: ID of the guild
+        :param board: Karma board
+        :param value: Board value
+
+        :return: Position on the board, starting at 1.
+        """
+        return self.get(guild_id, board).position(value)
+
+    def add(
+        self,
+        guild_id: int,
+        user_id: int,
+        value: int,
+        given: int,
+        taken: int,
+        score: float = 0.0,
+    ):
+        """Apply deltas that were written to the database to built rankings.
+
+        Rankings that are not built yet are skipped, they will be loaded
+        with the deltas already applied.
+
+        :param guild_id: ID of the guild
+        :param user_id: Discord ID of the member
+        :param value: Karma value delta
+        :param given: Given karma delta
+        :param taken: Taken karma delta
+        :param score: Rebased score delta
+        """
+        for board, delta in (
+            (BoardType.value, value),
+            (BoardType.given, given),
+            (BoardType.taken, taken),
+            (BoardType.score, score),
+        ):
+            ranking = self._rankings.get((guild_id, board))
+            if ranking is not None:
+                ranking.add(user_id, delta)
+
+    def remove(self, guild_id: int, user_id: int):
+        """Remove member that was deleted from the database from built rankings.
+
+        :param guild_id: ID of the guild
+        :param user_id: Discord ID of the member
+        """
+        for board in BoardType:
+            ranking = self._rankings.get((guild_id, board))
+            if ranking is not None:
+                ranking.remove(user_id)
+
+    def clear(self, guild_id: Optional[int] = None):
+        """Drop built rankings, they will be loaded again when needed.
+
+        :param guild_id: ID of the guild or None to drop all rankings.
+        """
+        if guild_id is None:
+            self._rankings = {}
+            return
+        for key in [key for key in self._rankings if key[0] == guild_id]:
+            del self._rankings[key]
+
+
+class DecayClock:
+    """Conversion between karma values and time-decayed scores.
+
+    Karma decays with the half-life, but it is never rewritten to do so.
+    A delta received at time ``t`` is added to the score multiplied by
+    ``2 ** ((t - epoch) / half_life)``, and the current value is the score
+    divided by the same factor of the current time. Newer deltas weigh more,
+    which is the same as older ones decaying, and the order of the scores
+    does not change as time passes.
+
+    The epoch is fixed, so scores never have to be rebased. The factor
+    grows by one binary order of magnitude per half-life, which stays far
+    within the range of a float for centuries.
+    """
+
+    __slots__ = ("half_life", "epoch")
+
+    def __init__(self, half_life: float, epoch: datetime):
+        """Create the clock.
+
+        :param half_life: Number of seconds after which karma loses half
+            of its value.
+        :param epoch: Time the scores are rebased to
+        """
+        self.half_life: float = half_life
+        self.epoch: float = epoch.timestamp()
+
+    def factor(self, now: Optional[float] = None) -> float:
+        """Get factor between values and scores.
+
+        :param now: UNIX timestamp, current time if not set
+        """
+        if now is None:
+            now = time.time()
+        return 2 ** ((now - self.epoch) / self.half_life)
+
+    def score(self, value: int) -> float:
+        """Turn karma value received now into score.
+
+        :param value: Karma value delta
+        """
+        return value * self.factor()
+
+    def value(self, score: float) -> int:
+        """Turn score into current decayed karma value.
+
+        :param score: Karma score
+        """
+        return round(score / self.factor())
+
+
+class BoardCache:
+    """Short-lived cache of karma board tops.
+
+    Uses (guild_id, board, order) tuple as key and holds list of
+    (user_id, value) tuples ordered by position.
+    """
+
+    __slots__ = ("ttl", "_boards")
+
+    def __init__(self, ttl: float):
+        """Create the cache.
+
+        :param ttl: Number of seconds the board is valid for.
+        """
+        self.ttl: float = ttl
+        self._boards: Dict[
+            Tuple[int, BoardType, BoardOrder], Tuple[float, List[Tuple[int, int]]]
+        ] = {}
+
+    def get(
+        self, guild_id: int, board: BoardType, order: BoardOrder
+    ) -> Optional[List[Tuple[int, int]]]:
+        """Get cached board.
+
+        :return: List of (user_id, value) tuples or None if not cached.
+        """
+        cached = self._boards.get((guild_id, board, order))
+        if cached is None:
+            return None
+        expires, users = cached
+        if expires < time.monotonic():
+            del self._boards[(guild_id, board, order)]
+            return None
+        return users
+
+    def set(
+        self,
+        guild_id: int,
+        board: BoardType,
+        order: BoardOrder,
+        users: List[Tuple[int, int]],
+    ):
+        """Cache the board.
+
+        :param users: List of (user_id, value) tuples ordered by position.
+        """
+        self._boards[(guild_id, board, order)] = (time.monotonic() + self.ttl, users)
+
+    def invalidate(self, guild_id: int):
+        """Drop all boards of the guild.
+
+        :param guild_id: ID of the guild
+        """
+        for key in [key for key in self._boards if key[0] == guild_id]:
+            del self._boards[key]
+
+
+class MessageAuthorCache:
+    """Bounded LRU cache of message authors.
+
+    Maps message ID to the ID of its author, so the message does not have
+    to be fetched only to find out who wrote it.
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "_authors")
+
+    def __init__(self, maxsize: int):
+        """Create the cache.
+
+        :param maxsize: Maximal number of cached messages.
+        """
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._authors: OrderedDict[int, int] = OrderedDict()
+
+    def get(self, message_id: int) -> Optional[int]:
+        """Get author of the message.
+
+        :param message_id: ID of the message
+        :return: Discord ID of the author or None if the message is not cached.
+        """
+        author_id = self._authors.get(message_id)
+        if author_id is None:
+            self.misses += 1
+            return None
+        self._authors.move_to_end(message_id)
+        self.hits += 1
+        return author_id
+
+    def add(self, message_id: int, author_id: int):
+        """Remember author of the message.
+
+        :param message_id: ID of the message
+        :param author_id: Discord ID of the author
+        """
+        self._authors[message_id] = author_id
+        self._authors.move_to_end(message_id)
+        if len(self._authors) > self.maxsize:
+            self._authors.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._authors)
@@ -1,14 +1,32 @@
 from __future__ import annotations
 
+from datetime import date, datetime
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
-from sqlalchemy import BigInteger, Integer, func
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    and_,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Mapped, mapped_column
 
 from pie.database import database, session
 
-VERSION = 2
+VERSION = 4
+
+# Amount of rows sent in one INSERT statement
+BULK_CHUNK_SIZE = 1000
 
 
 class BoardOrder(Enum):
@@ -20,10 +38,66 @@ class BoardType(Enum):
     taken = -1
     value = 0
     given = 1
+    score = 2
+
+
+def _upsert_add(
+    model: type,
+    rows: List[Dict[str, int]],
+    keys: List[str],
+    columns: List[str],
+    replace: Optional[List[str]] = None,
+):
+    """Insert rows, add their columns to the existing rows on conflict.
+
+    Rows are sent as multi-row ``INSERT ... ON CONFLICT DO UPDATE`` statements.
+    Does not commit, so it can be part of a bigger transaction.
+
+    :param model: Database model to write
+    :param rows: Rows to write
+    :param keys: Columns of the unique index used to detect the conflict
+    :param columns: Columns that are added to the existing values
+    :param replace: Columns that overwrite the existing values
+    """
+    dialect: str = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise ValueError(f"Unsupported database dialect {dialect}.")
+
+    for i in range(0, len(rows), BULK_CHUNK_SIZE):
+        query = insert(model).values(rows[i : i + BULK_CHUNK_SIZE])
+        query = query.on_conflict_do_update(
+            index_elements=[getattr(model, key) for key in keys],
+            set_={
+                **{
+                    column: getattr(model, column) + getattr(query.excluded, column)
+                    for column in columns
+                },
+                **{column: getattr(query.excluded, column) for column in replace or []},
+            },
+        )
+        session.execute(query)
 
 
 class KarmaMember(database.base):
+    """Karma of a member.
+
+    ``score`` is the time-decayed karma value rebased to the fixed decay
+    epoch, so it can be ranked by an index without being rewritten as time
+    passes.
+    """
+
     __tablename__ = "boards_karma_members"
+    __table_args__ = (
+        Index("ix_boards_karma_members_guild_user", "guild_id", "user_id", unique=True),
+        Index("ix_boards_karma_members_guild_value", "guild_id", "value", "user_id"),
+        Index("ix_boards_karma_members_guild_given", "guild_id", "given", "user_id"),
+        Index("ix_boards_karma_members_guild_taken", "guild_id", "taken", "user_id"),
+        Index("ix_boards_karma_members_guild_score", "guild_id", "score", "user_id"),
+    )
 
     idx: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     guild_id: Mapped[int] = mapped_column(BigInteger, default=None)
@@ -31,6 +105,7 @@ class KarmaMember(database.base):
     value: Mapped[int] = mapped_column(Integer, default=0)
     given: Mapped[int] = mapped_column(Integer, default=0)
     taken: Mapped[int] = mapped_column(Integer, default=0)
+    score: Mapped[float] = mapped_column(Float, default=0.0)
 
     @staticmethod
     def get_or_add(guild_id: int, user_id: int) -> KarmaMember:
@@ -48,6 +123,82 @@ class KarmaMember(database.base):
         )
         return query
 
+    @staticmethod
+    def get_or_empty(guild_id: int, user_id: int) -> KarmaMember:
+        """Get the member, or member with zero karma if it is not in the database.
+
+        The empty member is not added to the session, so it is never saved.
+        """
+        member = KarmaMember.get(guild_id, user_id)
+        if member is None:
+            member = KarmaMember(
+                guild_id=guild_id,
+                user_id=user_id,
+                value=0,
+                given=0,
+                taken=0,
+                score=0.0,
+            )
+        return member
+
+    @staticmethod
+    def get_empty(
+        after: int, limit: int, max_score: float
+    ) -> List[Tuple[int, int, int]]:
+        """Get members without any karma.
+
+        :param after: Only members with greater idx are returned
+        :param limit: Maximal number of members
+        :param max_score: Members with smaller absolute score have no karma
+
+        :return: List of (idx, guild_id, user_id) tuples ordered by idx.
+        """
+        query = (
+            session.query(KarmaMember.idx, KarmaMember.guild_id, KarmaMember.user_id)
+            .filter(KarmaMember.idx > after, KarmaMember._is_empty(max_score))
+            .order_by(KarmaMember.idx)
+            .limit(limit)
+            .all()
+        )
+        return [tuple(row) for row in query]
+
+    @staticmethod
+    def remove_empty(idxs: List[int], max_score: float) -> int:
+        """Remove members without any karma in one transaction.
+
+        Members that received karma since they were selected are kept.
+
+        :param idxs: Database IDs of the members
+        :param max_score: Members with smaller absolute score have no karma
+
+        :return: Number of removed members.
+        """
+        if not idxs:
+            return 0
+
+        try:
+            count = (
+                session.query(KarmaMember)
+                .filter(KarmaMember.idx.in_(idxs), KarmaMember._is_empty(max_score))
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return count
+
+    @staticmethod
+    def _is_empty(max_score: float):
+        return and_(
+            KarmaMember.value == 0,
+            KarmaMember.given == 0,
+            KarmaMember.taken == 0,
+            KarmaMember.score > -max_score,
+            KarmaMember.score < max_score,
+        )
+
     @staticmethod
     def get_count(guild_id: int) -> int:
         count = (
@@ -60,27 +211,105 @@ class KarmaMember(database.base):
 
     @staticmethod
     def get_list(
-        guild_id: int, board: BoardType, order: BoardOrder, limit: int, offset: int
+        guild_id: int,
+        board: BoardType,
+        order: BoardOrder,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[int, int]] = None,
     ) -> List[KarmaMember]:
+        """Get members ordered by the board value.
+
+        Members with the same value are ordered by their user ID in the same
+        direction, so (value, user_id) is a unique key of the order and can
+        be used for keyset pagination.
+
+        :param guild_id: ID of the guild
+        :param board: Board to get
+        :param order: Order of the board
+        :param limit: Maximal number of members
+        :param offset: Number of members to skip
+        :param after: (value, user_id) key of the last member of previous page
+
+        :return: List of members.
+        """
         column = getattr(KarmaMember, board.name)
 
         if order == BoardOrder.ASC:
-            order_by = column.asc()
+            order_by = (column.asc(), KarmaMember.user_id.asc())
         elif order == BoardOrder.DESC:
-            order_by = column.desc()
+            order_by = (column.desc(), KarmaMember.user_id.desc())
         else:
             raise ValueError(f"Unsupported BoardOrder {order}.")
 
-        query = (
-            session.query(KarmaMember)
+        query = session.query(KarmaMember).filter_by(guild_id=guild_id)
+        if after is not None:
+            key = tuple_(column, KarmaMember.user_id)
+            if order == BoardOrder.ASC:
+                query = query.filter(key > tuple_(*after))
+            else:
+                query = query.filter(key < tuple_(*after))
+
+        query = query.order_by(*order_by).offset(offset).limit(limit).all()
+
+        return query
+
+    @staticmethod
+    def get_board(
+        guild_id: int, board: BoardType, order: BoardOrder, limit: int, user_id: int
+    ) -> List[Tuple[int, int, int]]:
+        """Get top of the board together with the member's row in one query.
+
+        :param guild_id: ID of the guild
+        :param board: Board to get
+        :param order: Order of the board
+        :param limit: Number of rows from the top of the board
+        :param user_id: Discord ID of the member whose row is always included
+
+        :return: List of (position, user_id, value) tuples ordered by position.
+        """
+        column = getattr(KarmaMember, board.name)
+
+        if order == BoardOrder.ASC:
+            order_by = (column.asc(), KarmaMember.user_id.asc())
+        elif order == BoardOrder.DESC:
+            order_by = (column.desc(), KarmaMember.user_id.desc())
+        else:
+            raise ValueError(f"Unsupported BoardOrder {order}.")
+
+        ranked = (
+            session.query(
+                func.row_number().over(order_by=order_by).label("position"),
+                KarmaMember.user_id,
+                column.label("value"),
+            )
             .filter_by(guild_id=guild_id)
-            .order_by(order_by)
-            .offset(offset)
-            .limit(limit)
+            .subquery()
+        )
+        query = (
+            session.query(ranked.c.position, ranked.c.user_id, ranked.c.value)
+            .filter(or_(ranked.c.position <= limit, ranked.c.user_id == user_id))
+            .order_by(ranked.c.position)
             .all()
         )
+        return [(position, user_id, value) for position, user_id, value in query]
 
-        return query
+    @staticmethod
+    def get_values(guild_id: int, board: BoardType) -> List[Tuple[int, int]]:
+        """Get board values of all members in the guild.
+
+        :param guild_id: ID of the guild
+        :param board: Board to get the values of
+
+        :return: List of (user_id, value) tuples.
+        """
+        column = getattr(KarmaMember, board.name)
+        query = (
+            session.query(KarmaMember.user_id, column)
+            .filter_by(guild_id=guild_id)
+            .all()
+        )
+        return [(user_id, value) for user_id, value in query]
 
     @staticmethod
     def add(guild_id: int, user_id: int) -> KarmaMember:
@@ -91,6 +320,146 @@ class KarmaMember(database.base):
         session.commit()
         return member
 
+    @staticmethod
+    def add_deltas(
+        deltas: Dict[Tuple[int, int], Tuple[int, int, int]],
+        day: Optional[date] = None,
+        scores: Optional[Dict[Tuple[int, int], float]] = None,
+        sequence: Optional[int] = None,
+    ) -> int:
+        """Add karma deltas to multiple members in one transaction.
+
+        Members that are not in the database yet are created. The rows are
+        written as multi-row ``INSERT ... ON CONFLICT DO UPDATE`` statements,
+        which add the deltas to the existing values.
+
+        :param deltas: Mapping of (guild_id, user_id) to (value, given, taken)
+            deltas.
+        :param day: If set, the deltas are added to the :class:`KarmaLedger`
+            of that day in the same transaction.
+        :param scores: Mapping of (guild_id, user_id) to rebased score deltas.
+        :param sequence: If set, it is stored as :class:`KarmaJournalSequence`
+            in the same transaction.
+
+        :return: Number of written members.
+        """
+        if not deltas:
+            return 0
+
+        scores = scores or {}
+        # Sorted keys make concurrent transactions lock the rows in the same order
+        rows = [
+            {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "value": value,
+                "given": given,
+                "taken": taken,
+            }
+            for (guild_id, user_id), (value, given, taken) in sorted(deltas.items())
+        ]
+
+        try:
+            _upsert_add(
+                KarmaMember,
+                [
+                    dict(row, score=scores.get((row["guild_id"], row["user_id"]), 0.0))
+                    for row in rows
+                ],
+                keys=["guild_id", "user_id"],
+                columns=["value", "given", "taken", "score"],
+            )
+            if day is not None:
+                _upsert_add(
+                    KarmaLedger,
+                    [dict(row, day=day, monthly=False) for row in rows],
+                    keys=["guild_id", "user_id", "monthly", "day"],
+                    columns=["value", "given", "taken"],
+                )
+            if sequence is not None:
+                session.merge(KarmaJournalSequence(idx=1, sequence=sequence))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return len(rows)
+
+    @staticmethod
+    def get_chunk(
+        guild_id: int, after: int, limit: int = BULK_CHUNK_SIZE
+    ) -> List[Tuple[int, int, int, int]]:
+        """Get karma of members in the guild ordered by their ID.
+
+        Every chunk is a separate query on the unique index, so the session
+        may be committed between chunks.
+
+        :param guild_id: ID of the guild
+        :param after: Only members with greater user_id are returned
+        :param limit: Maximal number of members
+
+        :return: List of (user_id, value, given, taken) tuples.
+        """
+        query = (
+            session.query(
+                KarmaMember.user_id,
+                KarmaMember.value,
+                KarmaMember.given,
+                KarmaMember.taken,
+            )
+            .filter(KarmaMember.guild_id == guild_id, KarmaMember.user_id > after)
+            .order_by(KarmaMember.user_id)
+            .limit(limit)
+            .all()
+        )
+        return [tuple(row) for row in query]
+
+    @staticmethod
+    def set_many(
+        guild_id: int,
+        values: Dict[int, Tuple[int, int, int]],
+        scores: Dict[int, float],
+    ) -> int:
+        """Overwrite karma of multiple members in one transaction.
+
+        Members that are not in the database yet are created.
+
+        :param guild_id: ID of the guild
+        :param values: Mapping of user_id to (value, given, taken)
+        :param scores: Mapping of user_id to rebased score
+
+        :return: Number of written members.
+        """
+        if not values:
+            return 0
+
+        rows = [
+            {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "value": value,
+                "given": given,
+                "taken": taken,
+                "score": scores[user_id],
+            }
+            for user_id, (value, given, taken) in sorted(values.items())
+        ]
+
+        try:
+            _upsert_add(
+                KarmaMember,
+                rows,
+                keys=["guild_id", "user_id"],
+                columns=[],
+                replace=["value", "given", "taken", "score"],
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return len(rows)
+
     @property
     def value_position(self) -> int:
         value = (
@@ -129,19 +498,527 @@ class KarmaMember(database.base):
         return (
             f"<KarmaMember idx='{self.idx}' "
             f"guild_id='{self.guild_id}' user_id='{self.user_id}' "
+            f"value='{self.value}' given='{self.given}' taken='{self.taken}' "
+            f"score='{self.score}'>"
+        )
+
+    def dump(self) -> Dict[str, Union[int, float]]:
+        return {
+            "guild_id": self.guild_id,
+            "user_id": self.user_id,
+            "value": self.value,
+            "given": self.given,
+            "taken": self.taken,
+            "score": self.score,
+        }
+
+
+class KarmaJournalSequence(database.base):
+    """Sequence number of the last karma cache transaction.
+
+    The table has one row. Deltas in the karma journal with this or lower
+    sequence number are already saved.
+    """
+
+    __tablename__ = "boards_karma_journal_sequence"
+
+    idx: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sequence: Mapped[int] = mapped_column(BigInteger)
+
+    @staticmethod
+    def get() -> int:
+        query = session.query(KarmaJournalSequence).filter_by(idx=1).one_or_none()
+        return query.sequence if query is not None else 0
+
+    def __repr__(self) -> str:
+        return f"<KarmaJournalSequence sequence='{self.sequence}'>"
+
+
+class KarmaRecomputeMember(database.base):
+    """Shadow copy of :class:`KarmaMember` filled by the karma recompute.
+
+    Once all channels of the guild are processed, its rows replace the
+    guild's rows of :class:`KarmaMember` in one transaction.
+    """
+
+    __tablename__ = "boards_karma_recompute_members"
+    __table_args__ = (
+        Index(
+            "ix_boards_karma_recompute_members_guild_user",
+            "guild_id",
+            "user_id",
+            unique=True,
+        ),
+    )
+
+    idx: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger)
+    user_id: Mapped[int] = mapped_column(BigInteger)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+    given: Mapped[int] = mapped_column(Integer, default=0)
+    taken: Mapped[int] = mapped_column(Integer, default=0)
+
+    @staticmethod
+    def swap(guild_id: int, factor: float) -> int:
+        """Replace karma of the guild with the recomputed one.
+
+        Karma members, recomputed members and checkpoints of the guild are
+        all changed in one transaction. The history does not say when the
+        karma was received, so scores are set as if it was received now.
+
+        :param guild_id: ID of the guild
+        :param factor: Current decay factor, turns values into scores
+
+        :return: Number of karma members of the guild.
+        """
+        shadow = KarmaRecomputeMember
+        try:
+            session.query(KarmaMember).filter_by(guild_id=guild_id).delete(
+                synchronize_session=False
+            )
+            result = session.execute(
+                insert(KarmaMember).from_select(
+                    ["guild_id", "user_id", "value", "given", "taken", "score"],
+                    select(
+                        shadow.guild_id,
+                        shadow.user_id,
+                        shadow.value,
+                        shadow.given,
+                        shadow.taken,
+                        shadow.value * factor,
+                    ).where(shadow.guild_id == guild_id),
+                )
+            )
+            session.query(shadow).filter_by(guild_id=guild_id).delete(
+                synchronize_session=False
+            )
+            session.query(KarmaRecomputeCheckpoint).filter_by(guild_id=guild_id).delete(
+                synchronize_session=False
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return result.rowcount
+
+    @staticmethod
+    def discard(guild_id: int):
+        """Drop the unfinished recompute of the guild.
+
+        :param guild_id: ID of the guild
+        """
+        session.query(KarmaRecomputeMember).filter_by(guild_id=guild_id).delete()
+        session.query(KarmaRecomputeCheckpoint).filter_by(guild_id=guild_id).delete()
+        session.commit()
+
+    def __repr__(self) -> str:
+        return (
+            f"<KarmaRecomputeMember idx='{self.idx}' "
+            f"guild_id='{self.guild_id}' user_id='{self.user_id}' "
             f"value='{self.value}' given='{self.given}' taken='{self.taken}'>"
         )
 
-    def dump(self) -> Dict[str, int]:
+
+class KarmaRecomputeCheckpoint(database.base):
+    """Progress of the karma recompute in one channel.
+
+    ``message_id`` is the ID of the last message whose reactions are already
+    counted in :class:`KarmaRecomputeMember`.
+    """
+
+    __tablename__ = "boards_karma_recompute_checkpoints"
+    __table_args__ = (
+        Index(
+            "ix_boards_karma_recompute_checkpoints_guild_channel",
+            "guild_id",
+            "channel_id",
+            unique=True,
+        ),
+    )
+
+    idx: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger)
+    channel_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[Optional[int]] = mapped_column(BigInteger)
+    done: Mapped[bool] = mapped_column(default=False)
+
+    @staticmethod
+    def save(
+        guild_id: int,
+        channel_id: int,
+        message_id: Optional[int],
+        done: bool,
+        deltas: Dict[int, Tuple[int, int, int]],
+    ) -> KarmaRecomputeCheckpoint:
+        """Add the deltas to the recomputed karma and move the checkpoint.
+
+        Both are written in one transaction, so every message is counted
+        exactly once even if the recompute is interrupted.
+
+        :param guild_id: ID of the guild
+        :param channel_id: ID of the channel
+        :param message_id: ID of the last counted message
+        :param done: Whether the whole channel is counted
+        :param deltas: Mapping of user_id to (value, given, taken) deltas.
+        """
+        rows = [
+            {
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "value": value,
+                "given": given,
+                "taken": taken,
+            }
+            for user_id, (value, given, taken) in sorted(deltas.items())
+        ]
+        try:
+            if rows:
+                _upsert_add(
+                    KarmaRecomputeMember,
+                    rows,
+                    keys=["guild_id", "user_id"],
+                    columns=["value", "given", "taken"],
+                )
+            checkpoint = KarmaRecomputeCheckpoint.get(guild_id, channel_id)
+            if checkpoint is None:
+                checkpoint = KarmaRecomputeCheckpoint(
+                    guild_id=guild_id, channel_id=channel_id
+                )
+                session.add(checkpoint)
+            checkpoint.message_id = message_id
+            checkpoint.done = done
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return checkpoint
+
+    @staticmethod
+    def get(guild_id: int, channel_id: int) -> Optional[KarmaRecomputeCheckpoint]:
+        return (
+            session.query(KarmaRecomputeCheckpoint)
+            .filter_by(guild_id=guild_id, channel_id=channel_id)
+            .one_or_none()
+        )
+
+    @staticmethod
+    def get_all(guild_id: int) -> List[KarmaRecomputeCheckpoint]:
+        return (
+            session.query(KarmaRecomputeCheckpoint).filter_by(guild_id=guild_id).all()
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<KarmaRecomputeCheckpoint idx='{self.idx}' "
+            f"guild_id='{self.guild_id}' channel_id='{self.channel_id}' "
+            f"message_id='{self.message_id}' done='{self.done}'>"
+        )
+
+
+class KarmaLedger(database.base):
+    """Karma changes of members per day.
+
+    Days that are not needed for weekly boards anymore are compacted into
+    one row per month, which has ``monthly`` set and the first day of the
+    month as ``day``.
+    """
+
+    __tablename__ = "boards_karma_ledger"
+    __table_args__ = (
+        Index(
+            "ix_boards_karma_ledger_guild_user_day",
+            "guild_id",
+            "user_id",
+            "monthly",
+            "day",
+            unique=True,
+        ),
+        Index("ix_boards_karma_ledger_guild_day", "guild_id", "day"),
+    )
+
+    idx: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger)
+    user_id: Mapped[int] = mapped_column(BigInteger)
+    day: Mapped[date] = mapped_column(Date)
+    monthly: Mapped[bool] = mapped_column(default=False)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+    given: Mapped[int] = mapped_column(Integer, default=0)
+    taken: Mapped[int] = mapped_column(Integer, default=0)
+
+    @staticmethod
+    def get_board(
+        guild_id: int, board: BoardType, since: date, limit: int
+    ) -> List[Tuple[int, int]]:
+        """Get members with the highest karma change since the day.
+
+        :param guild_id: ID of the guild
+        :param board: Board to get
+        :param since: First day to include
+        :param limit: Maximal number of members
+
+        :return: List of (user_id, value) tuples.
+        """
+        total = func.sum(getattr(KarmaLedger, board.name)).label("total")
+        query = (
+            session.query(KarmaLedger.user_id, total)
+            .filter(KarmaLedger.guild_id == guild_id, KarmaLedger.day >= since)
+            .group_by(KarmaLedger.user_id)
+            .order_by(total.desc(), KarmaLedger.user_id.desc())
+            .limit(limit)
+            .all()
+        )
+        return [(user_id, value) for user_id, value in query]
+
+    @staticmethod
+    def compact(before: date, limit: int = 5000) -> int:
+        """Merge daily rows older than the day into monthly rows.
+
+        Runs in batches, each batch is one transaction.
+
+        :param before: Days before this day are compacted
+        :param limit: Number of daily rows merged in one batch
+
+        :return: Number of compacted daily rows.
+        """
+        compacted: int = 0
+        while True:
+            days = (
+                session.query(KarmaLedger)
+                .filter(KarmaLedger.monthly.is_(False), KarmaLedger.day < before)
+                .order_by(KarmaLedger.idx)
+                .limit(limit)
+                .all()
+            )
+            if not days:
+                return compacted
+
+            months: Dict[Tuple[int, int, date], List[int]] = {}
+            for row in days:
+                key = (row.guild_id, row.user_id, row.day.replace(day=1))
+                month = months.setdefault(key, [0, 0, 0])
+                month[0] += row.value
+                month[1] += row.given
+                month[2] += row.taken
+
+            rows = [
+                {
+                    "guild_id": guild_id,
+                    "user_id": user_id,
+                    "day": day,
+                    "monthly": True,
+                    "value": value,
+                    "given": given,
+                    "taken": taken,
+                }
+                for (guild_id, user_id, day), (value, given, taken) in sorted(
+                    months.items()
+                )
+            ]
+            try:
+                _upsert_add(
+                    KarmaLedger,
+                    rows,
+                    keys=["guild_id", "user_id", "monthly", "day"],
+                    columns=["value", "given", "taken"],
+                )
+                session.query(KarmaLedger).filter(
+                    KarmaLedger.idx.in_([row.idx for row in days])
+                ).delete(synchronize_session=False)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+
+            compacted += len(days)
+
+    def __repr__(self) -> str:
+        return (
+            f"<KarmaLedger idx='{self.idx}' "
+            f"guild_id='{self.guild_id}' user_id='{self.user_id}' "
+            f"day='{self.day}' monthly='{self.monthly}' "
+            f"value='{self.value}' given='{self.given}' taken='{self.taken}'>"
+        )
+
+    def dump(self) -> Dict[str, Union[int, bool, date]]:
         return {
             "guild_id": self.guild_id,
             "user_id": self.user_id,
+            "day": self.day,
+            "monthly": self.monthly,
             "value": self.value,
             "given": self.given,
             "taken": self.taken,
         }
 
 
+class KarmaEmojiUsage(database.base):
+    """Numbers of added and removed reactions of karma emojis.
+
+    ``emoji`` holds the emoji ID of custom emojis or the emoji string of
+    unicode emojis.
+    """
+
+    __tablename__ = "boards_karma_emoji_usage"
+    __table_args__ = (
+        Index(
+            "ix_boards_karma_emoji_usage_guild_emoji",
+            "guild_id",
+            "emoji",
+            unique=True,
+        ),
+        Index("ix_boards_karma_emoji_usage_guild_added", "guild_id", "added"),
+    )
+
+    idx: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger)
+    emoji: Mapped[str]
+    added: Mapped[int] = mapped_column(Integer, default=0)
+    removed: Mapped[int] = mapped_column(Integer, default=0)
+
+    @staticmethod
+    def add_counts(counts: Dict[Tuple[int, str], Tuple[int, int]]) -> int:
+        """Add reaction counts of multiple emojis in one transaction.
+
+        :param counts: Mapping of (guild_id, emoji) to (added, removed) counts.
+
+        :return: Number of written emojis.
+        """
+        if not counts:
+            return 0
+
+        rows = [
+            {"guild_id": guild_id, "emoji": emoji, "added": added, "removed": removed}
+            for (guild_id, emoji), (added, removed) in sorted(counts.items())
+        ]
+        try:
+            _upsert_add(
+                KarmaEmojiUsage,
+                rows,
+                keys=["guild_id", "emoji"],
+                columns=["added", "removed"],
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return len(rows)
+
+    @staticmethod
+    def get_top(guild_id: int, limit: int) -> List[KarmaEmojiUsage]:
+        """Get the most added emojis of the guild.
+
+        :param guild_id: ID of the guild
+        :param limit: Maximal number of emojis
+        """
+        return (
+            session.query(KarmaEmojiUsage)
+            .filter_by(guild_id=guild_id)
+            .order_by(KarmaEmojiUsage.added.desc())
+            .limit(limit)
+            .all()
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<KarmaEmojiUsage idx='{self.idx}' guild_id='{self.guild_id}' "
+            f"emoji='{self.emoji}' added='{self.added}' removed='{self.removed}'>"
+        )
+
+    def dump(self) -> Dict[str, Union[int, str]]:
+        return {
+            "guild_id": self.guild_id,
+            "emoji": self.emoji,
+            "added": self.added,
+            "removed": self.removed,
+        }
+
+
+class KarmaVote(database.base):
+    """Running vote over karma value of an emoji.
+
+    ``emoji`` holds the emoji ID of custom emojis or the emoji string of
+    unicode emojis, ``end`` is a naive UTC datetime.
+    """
+
+    __tablename__ = "boards_karma_votes"
+    __table_args__ = (Index("ix_boards_karma_votes_end", "end"),)
+
+    idx: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger)
+    channel_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[int] = mapped_column(BigInteger)
+    author_id: Mapped[int] = mapped_column(BigInteger)
+    emoji: Mapped[str]
+    end: Mapped[datetime] = mapped_column(DateTime)
+    voter_limit: Mapped[int]
+
+    @staticmethod
+    def add(
+        guild_id: int,
+        channel_id: int,
+        message_id: int,
+        author_id: int,
+        emoji: str,
+        end: datetime,
+        voter_limit: int,
+    ) -> KarmaVote:
+        query = KarmaVote(
+            guild_id=guild_id,
+            channel_id=channel_id,
+            message_id=message_id,
+            author_id=author_id,
+            emoji=emoji,
+            end=end.replace(tzinfo=None),
+            voter_limit=voter_limit,
+        )
+        session.add(query)
+        session.commit()
+        return query
+
+    @staticmethod
+    def get_all(idxs: Optional[List[int]] = None) -> List[KarmaVote]:
+        """Get votes ordered by their end.
+
+        :param idxs: Only get votes with these IDs
+        """
+        query = session.query(KarmaVote)
+        if idxs is not None:
+            query = query.filter(KarmaVote.idx.in_(idxs))
+        return query.order_by(KarmaVote.end).all()
+
+    @staticmethod
+    def remove_many(idxs: List[int]) -> int:
+        query = (
+            session.query(KarmaVote)
+            .filter(KarmaVote.idx.in_(idxs))
+            .delete(synchronize_session=False)
+        )
+        session.commit()
+        return query
+
+    def __repr__(self) -> str:
+        return (
+            f"<KarmaVote idx='{self.idx}' guild_id='{self.guild_id}' "
+            f"channel_id='{self.channel_id}' message_id='{self.message_id}' "
+            f"author_id='{self.author_id}' emoji='{self.emoji}' "
+            f"end='{self.end}' voter_limit='{self.voter_limit}'>"
+        )
+
+    def dump(self) -> Dict[str, Union[int, str, datetime]]:
+        return {
+            "guild_id": self.guild_id,
+            "channel_id": self.channel_id,
+            "message_id": self.message_id,
+            "author_id": self.author_id,
+            "emoji": self.emoji,
+            "end": self.end,
+            "voter_limit": self.voter_limit,
+        }
+
+
 class DiscordEmoji(database.base):
     __tablename__ = "boards_karma_discord_emojis"
 
@@ -170,9 +1047,11 @@ class DiscordEmoji(database.base):
         return query
 
     @staticmethod
-    def get_all(guild_id: int) -> List[DiscordEmoji]:
-        query = session.query(DiscordEmoji).filter_by(guild_id=guild_id).all()
-        return query
+    def get_all(guild_id: Optional[int] = None) -> List[DiscordEmoji]:
+        query = session.query(DiscordEmoji)
+        if guild_id is not None:
+            query = query.filter_by(guild_id=guild_id)
+        return query.all()
 
     @staticmethod
     def remove(guild_id: int, emoji_id: int) -> int:
@@ -184,6 +1063,26 @@ class DiscordEmoji(database.base):
         session.commit()
         return query
 
+    @staticmethod
+    def remove_many(guild_id: int, emoji_ids: List[int]) -> int:
+        """Remove multiple emojis with one query.
+
+        :param guild_id: ID of the guild
+        :param emoji_ids: IDs of the emojis
+
+        :return: Number of removed emojis.
+        """
+        query = (
+            session.query(DiscordEmoji)
+            .filter(
+                DiscordEmoji.guild_id == guild_id,
+                DiscordEmoji.emoji_id.in_(emoji_ids),
+            )
+            .delete(synchronize_session=False)
+        )
+        session.commit()
+        return query
+
     def __repr__(self) -> str:
         return (
             f"<DiscordEmoji idx='{self.idx}' guild_id='{self.guild_id}' "
@@ -233,9 +1132,11 @@ class UnicodeEmoji(database.base):
         return query
 
     @staticmethod
-    def get_all(guild_id: int) -> List[UnicodeEmoji]:
-        query = session.query(UnicodeEmoji).filter_by(guild_id=guild_id).all()
-        return query
+    def get_all(guild_id: Optional[int] = None) -> List[UnicodeEmoji]:
+        query = session.query(UnicodeEmoji)
+        if guild_id is not None:
+            query = query.filter_by(guild_id=guild_id)
+        return query.all()
 
     @staticmethod
     def remove(guild_id: int, emoji: str) -> int:
@@ -244,6 +1145,7 @@ class UnicodeEmoji(database.base):
             .filter_by(guild_id=guild_id, emoji=emoji)
             .delete()
         )
+        session.commit()
         return query
 
     def __repr__(self) -> str:
@@ -282,9 +1184,11 @@ class IgnoredChannel(database.base):
         return query
 
     @staticmethod
-    def get_all(guild_id: int) -> List[IgnoredChannel]:
-        query = session.query(IgnoredChannel).filter_by(guild_id=guild_id).all()
-        return query
+    def get_all(guild_id: Optional[int] = None) -> List[IgnoredChannel]:
+        query = session.query(IgnoredChannel)
+        if guild_id is not None:
+            query = query.filter_by(guild_id=guild_id)
+        return query.all()
 
     @staticmethod
     def add(guild_id: int, channel_id: int) -> Optional[IgnoredChannel]:
@@ -302,6 +1206,7 @@ class IgnoredChannel(database.base):
             .filter_by(guild_id=guild_id, channel_id=channel_id)
             .delete()
         )
+        session.commit()
         return query
 
     def __repr__(self) -> str:
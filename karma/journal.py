@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+class KarmaJournal:
+    """Append-only journal of karma cache deltas.
+
+    Deltas are buffered in memory and written to the file together with
+    one fsync by :meth:`sync` (group commit).
+
+    Every delta is written with a sequence number. New deltas get the
+    current ``sequence``. A flush first rewrites the journal (:meth:`rewrite`),
+    so each delta has the sequence number of the transaction that will save it,
+    and every transaction stores its sequence number in the database. Deltas
+    found in the journal on start are replayed into the cache, unless their
+    sequence number says they were already saved.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.sequence: int = 0
+        self._buffer: List[str] = []
+        self._lock = asyncio.Lock()
+        self._file = open(path, "a+", encoding="utf-8")
+
+        # Terminate line torn by a crash, so new deltas don't get glued to it
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+
+    def append(self, guild_id: int, user_id: int, value: int, given: int, taken: int):
+        """Buffer delta to be written by the next sync.
+
+        :param guild_id: Guild ID of the delta
+        :param user_id: Discord ID of the member
+        :param value: Karma value delta
+        :param given: Given karma delta
+        :param taken: Taken karma delta
+        """
+        self._buffer.append(
+            f"{self.sequence} {guild_id} {user_id} {value} {given} {taken}\n"
+        )
+
+    async def sync(self):
+        """Write buffered deltas and fsync them to the disk."""
+        async with self._lock:
+            if not self._buffer or self._file.closed:
+                return
+
+            lines, self._buffer = self._buffer, []
+            self._file.writelines(lines)
+            self._file.flush()
+            await asyncio.get_running_loop().run_in_executor(
+                None, os.fsync, self._file.fileno()
+            )
+
+    async def rewrite(
+        self,
+        deltas: Iterable[Tuple[int, Tuple[int, int], Tuple[int, int, int]]],
+        sequence: int,
+    ):
+        """Replace the journal and the buffer with the deltas.
+
+        The new journal is written and fsynced to a temporary file first,
+        which then atomically replaces the journal.
+
+        :param deltas: Iterable of (sequence, (guild_id, user_id),
+            (value, given, taken)) tuples that were not saved yet.
+        :param sequence: Sequence number of deltas appended from now on
+        """
+        async with self._lock:
+            self._buffer = []
+            self.sequence = sequence
+            lines = [
+                f"{seq} {guild_id} {user_id} {value} {given} {taken}\n"
+                for seq, (guild_id, user_id), (value, given, taken) in deltas
+            ]
+            path: str = self.path + ".tmp"
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.writelines(lines)
+                handle.flush()
+                await asyncio.get_running_loop().run_in_executor(
+                    None, os.fsync, handle.fileno()
+                )
+            os.replace(path, self.path)
+            self._file.close()
+            self._file = open(self.path, "a+", encoding="utf-8")
+
+    def replay(self, saved: int) -> Iterator[Tuple[int, int, int, int, int]]:
+        """Read deltas stored in the journal that were not saved.
+
+        Incomplete lines (e.g. from a write interrupted by a crash) are skipped.
+        Once the journal is read, ``sequence`` is set above every sequence
+        number that was used before.
+
+        :param saved: Sequence number of the last transaction saved
+            to the database
+
+        :return: Iterator of (guild_id, user_id, value, given, taken) tuples.
+        """
+        self._file.flush()
+        last: int = saved
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.endswith("\n"):
+                    continue
+                fields: List[str] = line.split()
+                seq: Optional[int] = None
+                try:
+                    if len(fields) == 6:
+                        seq = int(fields.pop(0))
+                    guild_id, user_id, value, given, taken = map(int, fields)
+                except ValueError:
+                    continue
+                # Journals written before sequence numbers hold unsaved deltas
+                if seq is not None:
+                    last = max(last, seq)
+                    if seq <= saved:
+                        continue
+                yield guild_id, user_id, value, given, taken
+        self.sequence = last + 1
+
+    def truncate(self):
+        """Drop all deltas, they were saved to the database."""
+        self._buffer = []
+        self._file.flush()
+        os.ftruncate(self._file.fileno(), 0)
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+# Reaction key: (message_id, emoji ID or unicode emoji string)
+ReactionKey = Tuple[int, Union[int, str]]
+
+
+class ReactionBucket:
+    """Token bucket of one reactor."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens: float = tokens
+        self.updated: float = now
+
+    def __repr__(self) -> str:
+        return f"<ReactionBucket tokens='{self.tokens}' updated='{self.updated}'>"
+
+
+class ReactionLimiter:
+    """Token bucket limiter of karma reactions per (guild_id, user_id).
+
+    Every added reaction takes one token, tokens are refilled with the rate
+    up to the burst. Added reactions without a token are dropped. Removed
+    reactions don't take tokens, they are dropped only if their addition
+    was dropped, so a reactor can't remove karma that was never received.
+
+    Buckets are kept in least recently used order. Buckets idle for longer
+    than ``idle`` seconds are expired, and the least recently used ones
+    are evicted when there are more than ``maxsize`` of them.
+
+    Dropped additions are remembered apart from the buckets until their
+    removal arrives, so they outlive the bucket of an idle reactor. They
+    are kept in least recently used order too, and the oldest ones are
+    forgotten when there are more than ``max_dropped`` of them.
+    """
+
+    __slots__ = (
+        "rate",
+        "burst",
+        "idle",
+        "maxsize",
+        "max_dropped",
+        "dropped",
+        "_buckets",
+        "_dropped_keys",
+    )
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        idle: float,
+        maxsize: int,
+        max_dropped: int,
+    ):
+        """Create the limiter.
+
+        :param rate: Number of tokens refilled per second
+        :param burst: Maximal number of tokens in a bucket
+        :param idle: Number of seconds after which an unused bucket is expired
+        :param maxsize: Maximal number of buckets
+        :param max_dropped: Maximal number of dropped reactions remembered
+        """
+        self.rate: float = rate
+        self.burst: int = burst
+        self.idle: float = idle
+        self.maxsize: int = maxsize
+        self.max_dropped: int = max_dropped
+        self.dropped: Dict[int, int] = {}
+        self._buckets: OrderedDict[Tuple[int, int], ReactionBucket] = OrderedDict()
+        self._dropped_keys: OrderedDict[Tuple[int, int, ReactionKey], None] = (
+            OrderedDict()
+        )
+
+    def allow(
+        self,
+        guild_id: int,
+        user_id: int,
+        reaction: ReactionKey,
+        added: bool,
+        now: Optional[float] = None,
+    ) -> bool:
+        """Decide whether the reaction should be processed.
+
+        :param guild_id: ID of the guild
+        :param user_id: Discord ID of the reactor
+        :param reaction: (message_id, emoji) key of the reaction
+        :param added: If the reaction was added or removed.
+        :param now: Monotonic time, current time if not set
+
+        :return: False if the reaction should be dropped.
+        """
+        if now is None:
+            now = time.monotonic()
+        self._expire(now)
+
+        dropped_key = (guild_id, user_id, reaction)
+        if not added:
+            if dropped_key not in self._dropped_keys:
+                return True
+            del self._dropped_keys[dropped_key]
+            self._count_drop(guild_id)
+            return False
+
+        key = (guild_id, user_id)
+        bucket: Optional[ReactionBucket] = self._buckets.get(key)
+
+        if bucket is None:
+            bucket = self._buckets[key] = ReactionBucket(self.burst, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) * self.rate
+            )
+            bucket.updated = now
+            self._buckets.move_to_end(key)
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+
+        self._dropped_keys[dropped_key] = None
+        self._dropped_keys.move_to_end(dropped_key)
+        if len(self._dropped_keys) > self.max_dropped:
+            self._dropped_keys.popitem(last=False)
+        self._count_drop(guild_id)
+        return False
+
+    def _count_drop(self, guild_id: int):
+        self.dropped[guild_id] = self.dropped.get(guild_id, 0) + 1
+
+    def _expire(self, now: float):
+        """Drop buckets that were not used for the idle time.
+
+        :param now: Monotonic time
+        """
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if now - bucket.updated < self.idle:
+                break
+            self._buckets.popitem(last=False)
+
+    def dropped_count(self) -> int:
+        """Get number of remembered dropped reactions."""
+        return len(self._dropped_keys)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
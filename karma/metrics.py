@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+# Upper bounds of histogram buckets in milliseconds
+BUCKETS: List[float] = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+class Histogram:
+    """Latency histogram with fixed buckets.
+
+    Percentiles are reported as the upper bound of the bucket they fall into.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        # Last bucket holds everything above the last bound
+        self.counts: List[int] = [0] * (len(BUCKETS) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, milliseconds: float):
+        """Record one measurement.
+
+        :param milliseconds: Measured duration
+        """
+        self.counts[bisect_left(BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, percent: float) -> float:
+        """Get upper bound of the bucket with the percentile.
+
+        :param percent: Percentile, between 0 and 100
+        :return: Duration in milliseconds, or the maximum for the last bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank: float = self.count * percent / 100
+        seen: int = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def dump(self) -> Dict[str, Union[int, float, List[int]]]:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+            "buckets": self.counts,
+        }
+
+
+class KarmaMetrics:
+    """Counters and latency histograms of the karma module.
+
+    Everything is kept in memory since the module was loaded.
+    """
+
+    __slots__ = ("started", "counters", "histograms")
+
+    def __init__(self):
+        self.started: float = time.time()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def increment(self, name: str, value: int = 1):
+        """Increase the counter.
+
+        :param name: Name of the counter
+        :param value: Number to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, milliseconds: float):
+        """Record duration to the histogram.
+
+        :param name: Name of the histogram
+        :param milliseconds: Measured duration
+        """
+        histogram: Optional[Histogram] = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(milliseconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Measure duration of the block into the histogram.
+
+        :param name: Name of the histogram
+        """
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def dump(self, gauges: Dict[str, int]) -> Dict:
+        """Get all metrics as a JSON serializable dictionary.
+
+        :param gauges: Current values (e.g. cache sizes) to include
+        """
+        return {
+            "started": self.started,
+            "dumped": time.time(),
+            "gauges": gauges,
+            "counters": dict(sorted(self.counters.items())),
+            "histograms": {
+                name: histogram.dump()
+                for name, histogram in sorted(self.histograms.items())
+            },
+        }
+
+    def write(self, path: str, gauges: Dict[str, int]):
+        """Atomically write all metrics to the JSON file.
+
+        :param path: Path of the file
+        :param gauges: Current values (e.g. cache sizes) to include
+        """
+        tmp_path: str = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.dump(gauges), handle, indent=2)
+        os.replace(tmp_path, path)
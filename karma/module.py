@@ -1,7 +1,27 @@
 import asyncio
+import heapq
+import io
 import math
+import os
 import re
-from typing import TYPE_CHECKING, List, Optional, Set, Tuple, Union
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import aiohttp
 
 import discord
 from discord.ext import commands, tasks
@@ -13,14 +33,33 @@ if TYPE_CHECKING:
     from ..starboard.module import Starboard
 
 from ..starboard.database import StarboardMessage
+from .cache import (
+    BoardCache,
+    DecayClock,
+    EmojiUsageCache,
+    FlushStats,
+    KarmaCache,
+    KarmaRankings,
+    MessageAuthorCache,
+)
 from .database import (
     BoardOrder,
     BoardType,
     DiscordEmoji,
     IgnoredChannel,
+    KarmaEmojiUsage,
+    KarmaJournalSequence,
+    KarmaLedger,
     KarmaMember,
+    KarmaRecomputeMember,
+    KarmaVote,
     UnicodeEmoji,
 )
+from .journal import KarmaJournal
+from .limiter import ReactionLimiter
+from .metrics import KarmaMetrics
+from .recompute import KarmaRecompute, KarmaRecomputeError
+from .transfer import FORMATS, KarmaTransferError, read_members, write_members
 
 _ = i18n.Translator("modules/boards").translate
 bot_log = logger.Bot.logger()
@@ -28,74 +67,578 @@ guild_log = logger.Guild.logger()
 
 EMOJI_REGEX = "^:[a-zA-Z0-9]+:$"
 
+# The karma cache is saved when it has this many keys, when its first
+# change is this old or when it takes this much memory, whichever comes first
+FLUSH_MAX_KEYS = 5_000
+FLUSH_MAX_AGE = 120.0
+FLUSH_MAX_MEMORY = 4 * 1024 * 1024
+
+# Number of keys saved in one transaction, bigger flushes are split and
+# yield to the event loop between the transactions
+FLUSH_CHUNK_SIZE = 1_000
+
+# Number of seconds the top of the karma boards is cached for
+BOARD_CACHE_TTL = 60
+
+# Number of seconds a reaction waits for being toggled back before it is processed
+REACTION_DEBOUNCE = 2.0
+
+# Number of messages whose authors are remembered
+MESSAGE_AUTHOR_CACHE_SIZE = 10_000
+
+# Every member can add this many karma reactions at once, and one more
+# every two seconds, further reactions are dropped
+REACTION_LIMIT_RATE = 0.5
+REACTION_LIMIT_BURST = 30
+
+# Number of seconds after which unused rate limits are forgotten, and maximal
+# numbers of rate limited members and of dropped reactions remembered
+REACTION_LIMIT_IDLE = 600
+REACTION_LIMIT_MEMBERS = 50_000
+REACTION_LIMIT_DROPPED = 100_000
+
+# Karma vote options and their labels in the log
+VOTE_OPTIONS = {"🔼": "+1", "0⃣": "0", "🔽": "-1"}
+
+# Number of channels whose history is read at once by the karma recompute
+RECOMPUTE_CONCURRENCY = 3
+
+# Number of messages counted by the karma recompute in one transaction
+RECOMPUTE_BATCH_SIZE = 500
+
+# Maximal length of Discord message content
+MESSAGE_LENGTH_LIMIT = 2000
+
+# Number of emojis displayed by the emoji statistics
+EMOJI_STATS_LIMIT = 20
+
+# Number of days kept in the ledger with daily precision, older days are
+# compacted into months
+LEDGER_DAILY_DAYS = 7
+
+# Number of seconds after which received karma loses half of its value
+DECAY_HALF_LIFE = 90 * 24 * 3600
+
+# Time the decayed scores are rebased to. Must not change once scores exist.
+DECAY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Number of members without karma removed in one transaction
+PRUNE_CHUNK_SIZE = 1_000
+
+# Number of imported members read or written at once
+IMPORT_CHUNK_SIZE = 1_000
+
+# Journal of karma deltas that were not saved to the database yet
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "karma.journal")
+
+METRICS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "karma.metrics.json"
+)
+
 
 class Karma(commands.Cog):
     """Module uses custom cache that is dumped to DB once in a while
     to increase performance as the reaction might be added and immediately removed.
 
-    The cache uses (guild_id, user_id) tuple as key.
+    The cache uses (guild_id, user_id) tuple as key and holds value, given
+    and taken deltas. Keys whose deltas cancel out are dropped immediately.
+    The cache is saved when it has too many keys, is too old or takes too
+    much memory; big caches are saved in several smaller transactions.
+    Every delta is also appended to a local journal, which is fsynced every
+    second and replayed on start, so karma is not lost if the bot is killed.
+    Deltas carry the sequence number of the transaction that saves them,
+    so saved deltas are never replayed twice.
+
+    Emoji values are needed for every reaction, so they are kept in memory
+    as well. The emoji cache uses guild_id as key and maps emoji ID (custom
+    emojis) or emoji string (unicode emojis) to the karma value. It is written
+    through on every change, so it never has to be reloaded.
+
+    The same applies to channels where karma is ignored, they are kept
+    as a set of channel IDs for each guild.
+
+    Authors of recently seen messages are remembered, so reactions on them
+    don't have to fetch the message.
+
+    Karma reactions of each member are rate limited by a token bucket before
+    anything is looked up, so spammed reactions don't cost database writes
+    or message fetches. Numbers of dropped reactions are counted per guild.
+
+    Reactions are held back for a short debounce window. When the same
+    reaction is removed (or added back) inside the window, both events are
+    dropped without any further processing.
+
+    Positions on karma boards are answered from sorted in-memory rankings,
+    which are built on first use and updated with every flushed delta.
+    Tops of the boards are cached for a short time and dropped on every
+    change of the guild's karma.
+
+    Flushed deltas are also added to a ledger with one row per member and
+    day, from which weekly, monthly and yearly boards are summed up. Once
+    a day, days that are not needed for weekly boards are compacted into
+    one row per month.
+
+    Reactions with karma emojis are counted per guild and emoji in memory
+    and the counters are saved together with the karma cache.
+
+    Karma votes are stored in the database. One scheduler task keeps their
+    ends in a heap, sleeps until the first one and evaluates all votes that
+    ended at once. Votes are loaded again on start, so they survive restarts.
+
+    Karma also decays with a half-life. Instead of rewriting all members
+    as time passes, each member has a score: the karma value rebased to one
+    fixed decay epoch, from which the current value is computed on read.
+    Leaderboard, loserboard and the rankings use the scores.
+
+    Looking up karma never creates the member. Members whose karma returned
+    to zero are removed once a day in small transactions, unless they have
+    a delta waiting in the cache, so they don't slow down the rankings.
     """
 
     def __init__(self, bot: Strawberry):
         self.bot: Strawberry = bot
 
-        self.value_cache = {}
-        self.given_cache = {}
-        self.taken_cache = {}
+        self.metrics = KarmaMetrics()
+        self.karma_cache = KarmaCache()
+        self.last_flush: Optional[FlushStats] = None
+        self._flush_lock = asyncio.Lock()
+        self.journal = KarmaJournal(JOURNAL_PATH)
+        self.replayed_count: int = self._replay_journal()
+
+        self.rankings = KarmaRankings()
+        self.decay = DecayClock(half_life=DECAY_HALF_LIFE, epoch=DECAY_EPOCH)
+        self.board_cache = BoardCache(ttl=BOARD_CACHE_TTL)
+        self.message_authors = MessageAuthorCache(maxsize=MESSAGE_AUTHOR_CACHE_SIZE)
+        self.emoji_usage = EmojiUsageCache()
+
+        self.emoji_cache: Dict[int, Dict[Union[int, str], int]] = {}
+        self._load_emoji_cache()
+
+        self.ignored_channels: Dict[int, Set[int]] = {}
+        self._load_ignored_channels()
+
+        self.debounce_window: float = REACTION_DEBOUNCE
+        self._pending_reactions: Dict[
+            Tuple[int, int, Union[int, str]],
+            Tuple[asyncio.TimerHandle, discord.RawReactionActionEvent, bool],
+        ] = {}
+        self._reaction_tasks: Set[asyncio.Task] = set()
+        self.reaction_limiter = ReactionLimiter(
+            rate=REACTION_LIMIT_RATE,
+            burst=REACTION_LIMIT_BURST,
+            idle=REACTION_LIMIT_IDLE,
+            maxsize=REACTION_LIMIT_MEMBERS,
+            max_dropped=REACTION_LIMIT_DROPPED,
+        )
+        self._recomputing: Set[int] = set()
+        # Guilds whose history is being counted, their reactions are dropped
+        self._counting_history: Set[int] = set()
+
+        self._vote_heap: List[Tuple[float, int]] = []
+        self._vote_wakeup = asyncio.Event()
+        self._load_votes()
 
         self.karma_cache_loop.start()
+        self.karma_journal_loop.start()
+        self.karma_ledger_loop.start()
+        self.karma_prune_loop.start()
+        self.karma_vote_loop.start()
+
+    def cog_unload(self):
+        # Processed before the final flush, see karma_cache_loop_after
+        for key in list(self._pending_reactions.keys()):
+            self._pending_reactions[key][0].cancel()
+            self._release_reaction(key)
+        self.karma_cache_loop.cancel()
+        self.karma_journal_loop.cancel()
+        self.karma_ledger_loop.cancel()
+        self.karma_prune_loop.cancel()
+        self.karma_vote_loop.cancel()
 
     # Karma cache
 
-    @tasks.loop(seconds=30.0)
+    @tasks.loop(seconds=5.0)
     async def karma_cache_loop(self) -> None:
-        self._karma_cache_save()
+        reason: Optional[str] = self._get_flush_reason()
+        if reason is None:
+            return
+
+        memory_size: int = self.karma_cache.memory_size()
+        try:
+            stats: FlushStats = await self._karma_cache_save(reason)
+        except Exception as exc:
+            # Unsaved deltas are back in the cache, the next tick retries.
+            # Letting the exception through would stop the loop for good.
+            self.metrics.increment("flush.errors")
+            await bot_log.error(
+                None,
+                None,
+                f"Karma cache could not be saved, triggered by {reason}.",
+                exception=exc,
+            )
+            return
+        await bot_log.debug(
+            None,
+            None,
+            f"Karma cache saved {stats.keys} members ({memory_size} bytes) "
+            f"in {stats.chunks} chunks, triggered by {reason}.",
+        )
 
     @karma_cache_loop.before_loop
     async def karma_cache_loop_before(self):
         """Wait until the bot is ready."""
         await self.bot.wait_until_ready()
+        if self.replayed_count:
+            await bot_log.info(
+                None,
+                None,
+                f"Karma journal replayed {self.replayed_count} unsaved deltas.",
+            )
 
     @karma_cache_loop.after_loop
     async def karma_cache_loop_after(self):
         if self.karma_cache_loop.is_being_cancelled():
-            self._karma_cache_save()
-
-    def _karma_cache_save(self):
-        """Save the karma values in given interval."""
-        value_cache = self.value_cache.copy()
-        self.value_cache = {}
-        given_cache = self.given_cache.copy()
-        self.given_cache = {}
-        taken_cache = self.taken_cache.copy()
-        self.taken_cache = {}
-
-        for (guild_id, member_id), delta in value_cache.items():
-            member = KarmaMember.get_or_add(guild_id, member_id)
-            member.value += delta
-            member.save()
-
-        for (guild_id, member_id), delta in given_cache.items():
-            member = KarmaMember.get_or_add(guild_id, member_id)
-            member.given += delta
-            member.save()
-
-        for (guild_id, member_id), delta in taken_cache.items():
-            member = KarmaMember.get_or_add(guild_id, member_id)
-            member.taken += delta
-            member.save()
+            # Released reactions have to reach the cache before it is saved
+            await asyncio.gather(*self._reaction_tasks, return_exceptions=True)
+            await self._karma_cache_save("unload")
+            self.journal.close()
+
+    @tasks.loop(seconds=1.0)
+    async def karma_journal_loop(self) -> None:
+        await self.journal.sync()
+
+    @karma_journal_loop.after_loop
+    async def karma_journal_loop_after(self):
+        if self.karma_journal_loop.is_being_cancelled():
+            await self.journal.sync()
+
+    @tasks.loop(hours=24.0)
+    async def karma_ledger_loop(self) -> None:
+        today: date = datetime.now(timezone.utc).date()
+        before: date = (today - timedelta(days=LEDGER_DAILY_DAYS)).replace(day=1)
+        count: int = KarmaLedger.compact(before)
+        if count:
+            await bot_log.debug(
+                None, None, f"Karma ledger compacted {count} daily rows."
+            )
+
+    @karma_ledger_loop.before_loop
+    async def karma_ledger_loop_before(self):
+        """Wait until the bot is ready."""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=24.0)
+    async def karma_prune_loop(self) -> None:
+        count: int = await self._prune_members()
+        if count:
+            await bot_log.debug(
+                None, None, f"Karma pruned {count} members without karma."
+            )
+
+    @karma_prune_loop.before_loop
+    async def karma_prune_loop_before(self):
+        """Wait until the bot is ready."""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop()
+    async def karma_vote_loop(self) -> None:
+        self._vote_wakeup.clear()
+        timeout: Optional[float] = None
+        if self._vote_heap:
+            timeout = max(0.0, self._vote_heap[0][0] - time.time())
+        try:
+            await asyncio.wait_for(self._vote_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        now: float = time.time()
+        ended: List[int] = []
+        while self._vote_heap and self._vote_heap[0][0] <= now:
+            ended.append(heapq.heappop(self._vote_heap)[1])
+        if ended:
+            await self._finish_votes(ended)
+
+    @karma_vote_loop.before_loop
+    async def karma_vote_loop_before(self):
+        """Wait until the bot is ready."""
+        await self.bot.wait_until_ready()
+
+    def _load_votes(self):
+        """Load running votes into the scheduler."""
+        self._vote_heap = []
+        for vote in KarmaVote.get_all():
+            self._schedule_vote(vote)
+
+    def _schedule_vote(self, vote: KarmaVote):
+        """Add the vote to the scheduler.
+
+        :param vote: Stored karma vote
+        """
+        end: float = vote.end.replace(tzinfo=timezone.utc).timestamp()
+        heapq.heappush(self._vote_heap, (end, vote.idx))
+        self._vote_wakeup.set()
+
+    def _replay_journal(self) -> int:
+        """Load deltas that were not saved before the bot was stopped.
+
+        :return: Number of replayed deltas.
+        """
+        count: int = 0
+        saved: int = KarmaJournalSequence.get()
+        for guild_id, user_id, value, given, taken in self.journal.replay(saved):
+            key = Karma.get_cache_key(guild_id, user_id)
+            self.karma_cache.add(key, value=value, given=given, taken=taken)
+            count += 1
+        return count
+
+    def _load_emoji_cache(self):
+        """Load karma values of all emojis into the emoji cache."""
+        self.emoji_cache = {}
+        for emoji in DiscordEmoji.get_all():
+            guild_emojis = self.emoji_cache.setdefault(emoji.guild_id, {})
+            guild_emojis[emoji.emoji_id] = emoji.value
+        for emoji in UnicodeEmoji.get_all():
+            guild_emojis = self.emoji_cache.setdefault(emoji.guild_id, {})
+            guild_emojis[emoji.emoji] = emoji.value
+
+    def _load_ignored_channels(self):
+        """Load channels where karma is ignored into the memory."""
+        self.ignored_channels = {}
+        for channel in IgnoredChannel.get_all():
+            self.ignored_channels.setdefault(channel.guild_id, set()).add(
+                channel.channel_id
+            )
+
+    async def _prune_members(self) -> int:
+        """Remove members without karma from the database and the rankings.
+
+        Members are removed in chunks of PRUNE_CHUNK_SIZE, each chunk is
+        one transaction. Members with a delta waiting in the karma cache
+        are kept, the delta would only create them again.
+
+        :return: Number of removed members.
+        """
+        count: int = 0
+        after: int = 0
+        # Decayed karma below one half is shown as zero
+        max_score: float = 0.5 * self.decay.factor()
+        while True:
+            # Flushed deltas must not be removed together with their member
+            async with self._flush_lock:
+                members = KarmaMember.get_empty(after, PRUNE_CHUNK_SIZE, max_score)
+                if not members:
+                    break
+                after = members[-1][0]
+
+                members = [m for m in members if m[1:] not in self.karma_cache]
+                count += KarmaMember.remove_empty(
+                    [idx for idx, _g, _u in members], max_score
+                )
+                for _idx, guild_id, user_id in members:
+                    self.rankings.remove(guild_id, user_id)
+                    self.board_cache.invalidate(guild_id)
+            await asyncio.sleep(0)
+
+        return count
+
+    async def _check_members(self, file: IO[bytes], format: str) -> int:
+        """Read the whole imported file without writing anything.
+
+        :param file: Binary file to read from, rewound afterwards
+        :param format: One of FORMATS
+
+        :raises KarmaTransferError: Line of the file is not valid.
+
+        :return: Number of members in the file.
+        """
+        count: int = 0
+        handle = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        try:
+            for _member in read_members(handle, format):
+                count += 1
+                if count % IMPORT_CHUNK_SIZE == 0:
+                    await asyncio.sleep(0)
+        finally:
+            handle.detach()
+            file.seek(0)
+        return count
+
+    async def _import_members(self, guild_id: int, file: IO[bytes], format: str) -> int:
+        """Write karma of members from the file in chunks.
+
+        Each chunk is one transaction, the event loop can process other
+        events between them. The file has to be checked by
+        :meth:`_check_members` first, so it is not written only partially.
+
+        :param guild_id: ID of the guild
+        :param file: Binary file to read from
+        :param format: One of FORMATS
+
+        :return: Number of imported members.
+        """
+        count: int = 0
+        values: Dict[int, Tuple[int, int, int]] = {}
+        handle = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        try:
+            for user_id, value, given, taken in read_members(handle, format):
+                values[user_id] = (value, given, taken)
+                if len(values) >= IMPORT_CHUNK_SIZE:
+                    count += self._import_chunk(guild_id, values)
+                    values = {}
+                    await asyncio.sleep(0)
+        finally:
+            handle.detach()
+
+        count += self._import_chunk(guild_id, values)
+        return count
+
+    def _import_chunk(
+        self, guild_id: int, values: Dict[int, Tuple[int, int, int]]
+    ) -> int:
+        scores: Dict[int, float] = {
+            user_id: self.decay.score(value)
+            for user_id, (value, _given, _taken) in values.items()
+        }
+        return KarmaMember.set_many(guild_id, values, scores)
+
+    def _get_gauges(self) -> Dict[str, int]:
+        """Get current sizes of the karma caches for the metrics."""
+        return {
+            "cache.karma_keys": len(self.karma_cache),
+            "cache.karma_bytes": self.karma_cache.memory_size(),
+            "cache.journal_buffer": len(self.journal),
+            "cache.emoji_usage_keys": len(self.emoji_usage),
+            "cache.message_authors": len(self.message_authors),
+            "cache.message_author_hits": self.message_authors.hits,
+            "cache.message_author_misses": self.message_authors.misses,
+            "cache.pending_reactions": len(self._pending_reactions),
+            "cache.reaction_limits": len(self.reaction_limiter),
+            "cache.reaction_drops": self.reaction_limiter.dropped_count(),
+        }
+
+    def _get_flush_reason(self) -> Optional[str]:
+        """Decide whether the karma cache should be saved.
+
+        :return: Name of the exceeded threshold or None if no threshold is hit.
+        """
+        if self.karma_cache.dirty_since is None:
+            return None
+        if len(self.karma_cache) >= FLUSH_MAX_KEYS:
+            return "keys"
+        if time.monotonic() - self.karma_cache.dirty_since >= FLUSH_MAX_AGE:
+            return "age"
+        if self.karma_cache.memory_size() >= FLUSH_MAX_MEMORY:
+            return "memory"
+        return None
+
+    async def _karma_cache_save(self, reason: str) -> FlushStats:
+        """Save the karma values.
+
+        Deltas are written in transactions of at most FLUSH_CHUNK_SIZE members,
+        together with the ledger of the current day. Between the transactions
+        the event loop can process other events.
+
+        Before the first transaction, the journal is rewritten so every delta
+        has the sequence number of its transaction, which is saved with it.
+        Deltas of saved transactions are skipped when the journal is replayed,
+        even if the bot is killed before the journal is rewritten again.
+
+        :param reason: Why the cache is saved, for the statistics
+        :return: Statistics of the flush.
+        """
+        async with self._flush_lock:
+            started: float = time.monotonic()
+            items = list(self.karma_cache.pop_all().items())
+            day: date = datetime.now(timezone.utc).date()
+
+            base: int = self.journal.sequence
+            if items:
+                try:
+                    await self.journal.rewrite(
+                        [
+                            (base + i // FLUSH_CHUNK_SIZE, key, delta)
+                            for i, (key, delta) in enumerate(items)
+                        ],
+                        sequence=base + math.ceil(len(items) / FLUSH_CHUNK_SIZE),
+                    )
+                except Exception:
+                    for key, (value, given, taken) in items:
+                        self.karma_cache.add(key, value=value, given=given, taken=taken)
+                    raise
+
+            chunks: int = 0
+            for i in range(0, len(items), FLUSH_CHUNK_SIZE):
+                chunk = items[i : i + FLUSH_CHUNK_SIZE]
+                scores: Dict[Tuple[int, int], float] = {
+                    key: self.decay.score(value)
+                    for key, (value, _given, _taken) in chunk
+                }
+                try:
+                    with self.metrics.timer("flush.transaction"):
+                        KarmaMember.add_deltas(
+                            dict(chunk), day=day, scores=scores, sequence=base + chunks
+                        )
+                    self.metrics.increment("db.flush_transactions")
+                except Exception:
+                    # Keep the unsaved deltas for the next flush
+                    for key, (value, given, taken) in items[i:]:
+                        self.karma_cache.add(key, value=value, given=given, taken=taken)
+                    raise
+                chunks += 1
+
+                for (guild_id, user_id), (value, given, taken) in chunk:
+                    self.rankings.add(
+                        guild_id,
+                        user_id,
+                        value,
+                        given,
+                        taken,
+                        scores[(guild_id, user_id)],
+                    )
+                    self.board_cache.invalidate(guild_id)
+
+                if i + FLUSH_CHUNK_SIZE < len(items):
+                    await asyncio.sleep(0)
+
+            # Only deltas added during the flush are left to be journaled
+            if len(self.karma_cache):
+                await self.journal.rewrite(
+                    [
+                        (self.journal.sequence, key, delta)
+                        for key, delta in self.karma_cache.items()
+                    ],
+                    sequence=self.journal.sequence,
+                )
+            else:
+                self.journal.truncate()
+
+            if KarmaEmojiUsage.add_counts(self.emoji_usage.pop_all()):
+                self.metrics.increment("db.emoji_usage_transactions")
+
+            self.last_flush = FlushStats(
+                reason, len(items), chunks, time.monotonic() - started
+            )
+            self.metrics.observe("flush", self.last_flush.duration * 1000)
+            self.metrics.increment(f"flush.reason.{reason}")
+            return self.last_flush
 
     # Listeners
 
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Remember authors of new messages."""
+        if message.guild is not None:
+            self.message_authors.add(message.id, message.author.id)
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, reaction: discord.RawReactionActionEvent):
         """Handle added reactions."""
-        await self._process_reaction(reaction=reaction, added=True)
+        self._debounce_reaction(reaction=reaction, added=True)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, reaction: discord.RawReactionActionEvent):
         """Handle removed reactions."""
-        await self._process_reaction(reaction=reaction, added=False)
+        self._debounce_reaction(reaction=reaction, added=False)
 
     # Commands
 
@@ -111,7 +654,14 @@ class Karma(commands.Cog):
         """Display karma information on some user."""
         if member is None:
             member = ctx.author
-        kmember = KarmaMember.get_or_add(ctx.guild.id, member.id)
+        kmember = KarmaMember.get_or_empty(ctx.guild.id, member.id)
+
+        positions = {
+            board: self.rankings.position(
+                ctx.guild.id, board, getattr(kmember, board.name)
+            )
+            for board in BoardType
+        }
 
         embed = utils.discord.create_embed(
             author=ctx.author,
@@ -121,16 +671,24 @@ class Karma(commands.Cog):
 
         embed.add_field(
             name=_(ctx, "Karma"),
-            value=f"**{kmember.value}** (#{kmember.value_position})",
+            value=f"**{kmember.value}** (#{positions[BoardType.value]})",
+            inline=False,
+        )
+        embed.add_field(
+            name=_(ctx, "Current karma"),
+            value=(
+                f"**{self.decay.value(kmember.score)}** "
+                f"(#{positions[BoardType.score]})"
+            ),
             inline=False,
         )
         embed.add_field(
             name=_(ctx, "Karma given"),
-            value=f"**{kmember.given}** (#{kmember.given_position})",
+            value=f"**{kmember.given}** (#{positions[BoardType.given]})",
         )
         embed.add_field(
             name=_(ctx, "Karma taken"),
-            value=f"**{kmember.taken}** (#{kmember.taken_position})",
+            value=f"**{kmember.taken}** (#{positions[BoardType.taken]})",
         )
 
         avatar_url: str = member.display_avatar.replace(size=256).url
@@ -179,84 +737,90 @@ class Karma(commands.Cog):
     @karma_.command(name="emojis")
     async def karma_emojis(self, ctx):
         """Display karma emojis on this server."""
-        emojis = DiscordEmoji.get_all(ctx.guild.id) + UnicodeEmoji.get_all(ctx.guild.id)
-        if not emojis:
+        guild_emojis: Dict[Union[int, str], int] = self.emoji_cache.get(
+            ctx.guild.id, {}
+        )
+        if not guild_emojis:
             await ctx.reply(_(ctx, "No emoji has karma value on this server."))
             return
 
-        emojis_positive = [e for e in emojis if e.value > 0]
-        emojis_neutral = [e for e in emojis if e.value == 0]
-        emojis_negative = [e for e in emojis if e.value < 0]
-
-        not_voted_emoji_ids: List[int] = []
-        db_ids: Set[str] = set([e.emoji_id for e in DiscordEmoji.get_all(ctx.guild.id)])
-        for emoji in ctx.guild.emojis:
-            if emoji.id not in db_ids:
-                not_voted_emoji_ids.append(emoji.id)
-
-        missing_emojis: int = 0
-
-        def format_emojis(
-            emojis: List[Union[UnicodeEmoji, DiscordEmoji, int]]
-        ) -> List[str]:
-            """Format a list of emojis or emoji IDs."""
-            nonlocal missing_emojis
-
-            emoji_list = []
-            for i, emoji in enumerate(emojis):
-                if isinstance(emoji, UnicodeEmoji):
-                    emoji_str = emoji.emoji
-                if isinstance(emoji, DiscordEmoji):
-                    emoji = emoji.emoji_id
-                if isinstance(emoji, int):
-                    guild_emoji: Optional[discord.Emoji] = self.bot.get_emoji(emoji)
-                    if guild_emoji is None:
-                        DiscordEmoji.remove(ctx.guild.id, emoji)
-                        missing_emojis += 1
-                        continue
-                    emoji_str = str(guild_emoji)
-                emoji_list.append(emoji_str)
-
-            lines = [emoji_list[i : i + 8] for i in range(0, len(emoji_list), 8)]
-            lines = [" ".join(line) for line in lines]
-
-            messages = [lines[i : i + 3] for i in range(0, len(lines), 3)]
-            messages = ["\n".join(message) for message in messages]
-
-            return messages
-
-        if len(emojis_positive):
-            await ctx.send(_(ctx, "Emojis with positive karma"))
-            for line in format_emojis(emojis_positive):
-                if line:
-                    await ctx.send(line)
-        if len(emojis_neutral):
-            await ctx.send(_(ctx, "Emojis with neutral karma"))
-            for line in format_emojis(emojis_neutral):
-                if line:
-                    await ctx.send(line)
-        if len(emojis_negative):
-            await ctx.send(_(ctx, "Emojis with negative karma"))
-            for line in format_emojis(emojis_negative):
-                if line:
-                    await ctx.send(line)
-        if len(not_voted_emoji_ids):
-            await ctx.send(_(ctx, "Emojis with no karma value"))
-            for line in format_emojis(not_voted_emoji_ids):
-                if line:
-                    await ctx.send(line)
-
-        if missing_emojis:
+        missing_emoji_ids: List[int] = [
+            emoji
+            for emoji in guild_emojis
+            if isinstance(emoji, int) and self.bot.get_emoji(emoji) is None
+        ]
+        if missing_emoji_ids:
+            DiscordEmoji.remove_many(ctx.guild.id, missing_emoji_ids)
+            for emoji_id in missing_emoji_ids:
+                guild_emojis.pop(emoji_id, None)
+
+        def format_emojis(values: Callable[[int], bool]) -> List[str]:
+            """Format emojis whose karma value passes the filter."""
+            return [
+                str(self.bot.get_emoji(emoji)) if isinstance(emoji, int) else emoji
+                for emoji, value in guild_emojis.items()
+                if values(value)
+            ]
+
+        messages: List[str] = Karma._pack_emoji_lists(
+            [
+                (_(ctx, "Emojis with positive karma"), format_emojis(lambda v: v > 0)),
+                (_(ctx, "Emojis with neutral karma"), format_emojis(lambda v: v == 0)),
+                (_(ctx, "Emojis with negative karma"), format_emojis(lambda v: v < 0)),
+                (
+                    _(ctx, "Emojis with no karma value"),
+                    [str(e) for e in ctx.guild.emojis if e.id not in guild_emojis],
+                ),
+            ]
+        )
+        for message in messages:
+            await ctx.send(message)
+
+        if missing_emoji_ids:
             await guild_log.info(
                 ctx.author,
                 ctx.channel,
                 (
-                    f"{missing_emojis} emojis were not found when "
+                    f"{len(missing_emoji_ids)} emojis were not found when "
                     "karma emojis were displayed. They have "
                     "been removed from the database."
                 ),
             )
 
+    @check.acl2(check.ACLevel.MEMBER)
+    @karma_.command(name="emojistats")
+    async def karma_emojistats(self, ctx):
+        """Display the most used karma emojis on this server."""
+        usages = KarmaEmojiUsage.get_top(ctx.guild.id, EMOJI_STATS_LIMIT)
+        if not usages:
+            await ctx.reply(_(ctx, "No karma emoji has been used yet."))
+            return
+
+        lines: List[str] = []
+        for usage in usages:
+            if usage.emoji.isdigit():
+                guild_emoji: Optional[discord.Emoji] = self.bot.get_emoji(
+                    int(usage.emoji)
+                )
+                if guild_emoji is None:
+                    continue
+                emoji_str = str(guild_emoji)
+            else:
+                emoji_str = usage.emoji
+            lines.append(f"`{usage.added:>6}` `{usage.removed:>6}` … {emoji_str}")
+
+        embed = utils.discord.create_embed(
+            author=ctx.author,
+            title=_(ctx, "Karma emoji usage"),
+            description=_(ctx, "Added and removed reactions"),
+        )
+        embed.add_field(
+            name=_(ctx, "Top {limit}").format(limit=len(lines)),
+            value="\n".join(lines) or "-",
+            inline=False,
+        )
+        await ctx.reply(embed=embed)
+
     @check.acl2(check.ACLevel.MOD)
     @karma_.command(name="vote")
     async def karma_vote(
@@ -319,76 +883,25 @@ class Karma(commands.Cog):
         # Set the value to zero, so we can run this command multiple times
         # without starting a vote over the same emoji over and over.
         if isinstance(emoji, discord.Emoji):
-            DiscordEmoji.add(ctx.guild.id, emoji.id, 0)
+            self._set_emoji_value(ctx.guild.id, emoji.id, 0)
 
         await guild_log.info(
             ctx.author, ctx.channel, f"Karma vote over emoji '{emoji_name}' started."
         )
 
-        votes = {"🔼": 0, "0⃣": 0, "🔽": 0}
-        emoji_labels = {"🔼": "+1", "0⃣": "0", "🔽": "-1"}
-        for vote_option in votes.keys():
+        for vote_option in VOTE_OPTIONS.keys():
             await vote_message.add_reaction(vote_option)
 
-        await asyncio.sleep(time_limit * 60)
-
-        # Fetch updated message with the votes
-        vote_message = await vote_message.channel.fetch_message(vote_message.id)
-        for reaction in vote_message.reactions:
-            if str(reaction.emoji) not in votes.keys():
-                continue
-            votes[reaction.emoji] = reaction.count - 1
-
-        log_message: str = (
-            f"Karma vote over emoji '{emoji_name}' ended: "
-            + ", ".join(f"{v}x {emoji_labels[k]}" for k, v in votes.items())
-            + "."
-        )
-
-        if sum(votes.values()) < voter_limit:
-            await guild_log.info(
-                ctx.author,
-                ctx.channel,
-                log_message + " Not enough votes, aborted.",
-            )
-            await ctx.send(
-                _(gtx, "Vote over {emoji} failed (not enough votes).").format(
-                    emoji=str(emoji)
-                )
-            )
-            return
-
-        result: Optional[int] = None
-        if votes["🔼"] > votes["0⃣"] and votes["🔼"] > votes["🔽"]:
-            result = 1
-        elif votes["0⃣"] > votes["🔽"] and votes["0⃣"] > votes["🔼"]:
-            result = 0
-        elif votes["🔽"] > votes["0⃣"] and votes["🔽"] > votes["🔼"]:
-            result = -1
-        else:
-            await guild_log.info(
-                ctx.author,
-                ctx.channel,
-                log_message + " Inconclusive, aborted.",
-            )
-            await ctx.send(
-                _(gtx, "Vote over {emoji} ended in a draw.").format(emoji=str(emoji))
-            )
-            return
-
-        if isinstance(emoji, discord.Emoji):
-            DiscordEmoji.add(ctx.guild.id, emoji.id, result)
-        if isinstance(emoji, str):
-            UnicodeEmoji.add(ctx.guild.id, emoji, result)
-
-        await guild_log.info(
-            ctx.author, ctx.channel, log_message + f" Setting to {result}."
-        )
-        await ctx.send(
-            _(gtx, "Karma value of {emoji} is **{value}**.").format(
-                emoji=str(emoji), value=result
-            )
+        vote = KarmaVote.add(
+            guild_id=ctx.guild.id,
+            channel_id=vote_message.channel.id,
+            message_id=vote_message.id,
+            author_id=ctx.author.id,
+            emoji=str(Karma.get_emoji_key(emoji)),
+            end=datetime.now(timezone.utc) + timedelta(minutes=time_limit),
+            voter_limit=voter_limit,
         )
+        self._schedule_vote(vote)
 
     @check.acl2(check.ACLevel.MOD)
     @karma_.command(name="unset")
@@ -396,7 +909,7 @@ class Karma(commands.Cog):
         """Set emoji's karma value."""
         emoji_name: str
         if isinstance(emoji, discord.PartialEmoji):
-            DiscordEmoji.remove(ctx.guild.id, emoji.id)
+            self._unset_emoji_value(ctx.guild.id, emoji.id)
             emoji_name = emoji.name
         elif re.match(EMOJI_REGEX, emoji):
             found_emoji = discord.utils.get(
@@ -405,10 +918,10 @@ class Karma(commands.Cog):
             if not found_emoji:
                 await ctx.reply(_(ctx, "Emoji {emoji} not found.").format(emoji=emoji))
                 return
-            DiscordEmoji.remove(ctx.guild.id, found_emoji.id)
+            self._unset_emoji_value(ctx.guild.id, found_emoji.id)
             emoji_name = found_emoji.name
         else:
-            UnicodeEmoji.remove(ctx.guild.id, emoji)
+            self._unset_emoji_value(ctx.guild.id, emoji)
             emoji_name = emoji
 
         await guild_log.info(
@@ -425,7 +938,7 @@ class Karma(commands.Cog):
 
         emoji_name: str
         if isinstance(emoji, discord.PartialEmoji):
-            DiscordEmoji.add(ctx.guild.id, emoji.id, value)
+            self._set_emoji_value(ctx.guild.id, emoji.id, value)
             emoji_name = emoji.name
         elif re.match(EMOJI_REGEX, emoji):
             found_emoji = discord.utils.get(
@@ -434,10 +947,10 @@ class Karma(commands.Cog):
             if not found_emoji:
                 await ctx.reply(_(ctx, "Emoji {emoji} not found.").format(emoji=emoji))
                 return
-            DiscordEmoji.add(ctx.guild.id, found_emoji.id, value)
+            self._set_emoji_value(ctx.guild.id, found_emoji.id, value)
             emoji_name = found_emoji.name
         else:
-            UnicodeEmoji.add(ctx.guild.id, emoji, value)
+            self._set_emoji_value(ctx.guild.id, emoji, value)
             emoji_name = emoji
 
         await guild_log.info(
@@ -449,38 +962,28 @@ class Karma(commands.Cog):
     @karma_.command(name="message")
     async def karma_message(self, ctx, message: discord.Message):
         """Display total message karma."""
-        if IgnoredChannel.get(message.guild.id, message.channel.id) is not None:
+        if self._is_ignored(message.guild.id, message.channel.id):
             await ctx.reply(_(ctx, "Karma is disabled in message's channel."))
             return
 
         message_karma: int = 0
         output = {"negative": [], "neutral": [], "positive": []}
-        for reaction in message.reactions:
-            if type(reaction.emoji) is discord.Emoji:
-                emoji = DiscordEmoji.get(ctx.guild.id, reaction.emoji.id)
-            elif type(reaction.emoji) is str:
-                emoji = UnicodeEmoji.get(ctx.guild.id, reaction.emoji)
-            else:
-                # PartialEmoji which is not usable by the bot
-                emoji = None
-
-            if not emoji:
+        emoji_values: List[Optional[int]] = self.get_emoji_values(
+            ctx.guild.id, [reaction.emoji for reaction in message.reactions]
+        )
+        for reaction, emoji_value in zip(message.reactions, emoji_values):
+            # PartialEmoji is not usable by the bot
+            if emoji_value is None or isinstance(reaction.emoji, discord.PartialEmoji):
                 continue
 
-            emoji_to_append = (
-                emoji.emoji
-                if isinstance(emoji, UnicodeEmoji)
-                else self.bot.get_emoji(emoji.emoji_id)
-            )
-
-            if emoji.value < 0:
-                output["negative"].append(emoji_to_append)
+            if emoji_value < 0:
+                output["negative"].append(reaction.emoji)
                 message_karma -= reaction.count
-            elif emoji.value > 0:
-                output["positive"].append(emoji_to_append)
+            elif emoji_value > 0:
+                output["positive"].append(reaction.emoji)
                 message_karma += reaction.count
             else:
-                output["neutral"].append(emoji_to_append)
+                output["neutral"].append(reaction.emoji)
 
         embed = utils.discord.create_embed(
             author=ctx.author,
@@ -534,20 +1037,46 @@ class Karma(commands.Cog):
     @check.acl2(check.ACLevel.MOD)
     @karma_.command(name="give")
     async def karma_give(
-        self, ctx, value: int, members: commands.Greedy[discord.Member]
+        self,
+        ctx,
+        value: int,
+        members: commands.Greedy[discord.Member],
+        role: Optional[discord.Role] = None,
     ):
-        """Give some karma to multiple users."""
-        if not members:
+        """Give some karma to multiple users.
+
+        Args:
+            value: Number of karma points.
+            members: Members to give the karma to.
+            role: Give the karma to every member of the role as well.
+        """
+        targets: Dict[int, discord.Member] = {member.id: member for member in members}
+        if role is not None:
+            targets.update({member.id: member for member in role.members})
+
+        if not targets:
             await ctx.reply(_(ctx, "You have to specify at least one member."))
             return
 
-        for member in members:
-            user = KarmaMember.get_or_add(ctx.guild.id, member.id)
-            user.value += value
-            user.save()
+        score: float = self.decay.score(value)
+        KarmaMember.add_deltas(
+            {
+                Karma.get_cache_key(ctx.guild.id, user_id): (value, 0, 0)
+                for user_id in targets.keys()
+            },
+            day=datetime.now(timezone.utc).date(),
+            scores={
+                Karma.get_cache_key(ctx.guild.id, user_id): score
+                for user_id in targets.keys()
+            },
+        )
+        for user_id in targets.keys():
+            self.rankings.add(ctx.guild.id, user_id, value, 0, 0, score)
+        self.board_cache.invalidate(ctx.guild.id)
 
         reply: str
-        if len(members) == 1:
+        if len(targets) == 1:
+            member: discord.Member = next(iter(targets.values()))
             reply = _(ctx, "Member {member} got {value} karma points.").format(
                 member=utils.text.sanitise(member.name),
                 value=value,
@@ -558,104 +1087,481 @@ class Karma(commands.Cog):
             )
         await ctx.reply(reply)
 
+        if role is not None:
+            await guild_log.info(
+                ctx.author,
+                ctx.channel,
+                f"{value} karma points added to {len(targets)} members "
+                f"(role {role.name}).",
+            )
+            return
         await guild_log.info(
             ctx.author,
             ctx.channel,
             f"{value} karma points added to " + ", ".join([m.name for m in members]),
         )
 
-    @check.acl2(check.ACLevel.MEMBER)
-    @karma_.command(name="leaderboard")
-    async def karma_leaderboard(self, ctx):
-        """Display karma leaders."""
-        embeds = Karma._create_embeds(
-            ctx=ctx,
-            title=_(ctx, "Karma leaderboard"),
-            description=_(ctx, "Score, descending"),
-            board=BoardType.value,
-            order=BoardOrder.DESC,
-        )
+    @check.acl2(check.ACLevel.GUILD_OWNER)
+    @karma_.group(name="recompute")
+    async def karma_recompute(self, ctx):
+        """Rebuild karma from the message history."""
+        await utils.discord.send_help(ctx)
 
-        if not embeds:
-            await ctx.reply(_(ctx, "Karma data not yet available."))
+    @check.acl2(check.ACLevel.GUILD_OWNER)
+    @karma_recompute.command(name="start")
+    async def karma_recompute_start(self, ctx):
+        """Rebuild karma of all members from reactions in the message history.
+
+        Reactions are counted with the current emoji values and ignored
+        channels, in text channels, voice and stage channel chats and all
+        active and archived threads and forum posts. Karma from channels the
+        bot can't read is dropped. Interrupted recompute continues where it
+        stopped. Karma given by the give command is not part of the history
+        and is dropped, and so are reactions added or removed while the
+        recompute runs.
+        """
+        if ctx.guild.id in self._recomputing:
+            await ctx.reply(_(ctx, "Karma is already being recomputed."))
             return
 
-        scrollable = utils.ScrollableEmbed(ctx, embeds)
-        await scrollable.scroll()
-
-    @check.acl2(check.ACLevel.MEMBER)
-    @karma_.command(name="loserboard")
-    async def karma_loserboard(self, ctx):
-        """Display karma losers."""
-        embeds = Karma._create_embeds(
-            ctx=ctx,
-            title=_(ctx, "Karma loserboard"),
-            description=_(ctx, "Score, ascending"),
-            board=BoardType.value,
-            order=BoardOrder.ASC,
+        recompute = KarmaRecompute(
+            ctx.guild,
+            get_emoji_value=lambda emoji: self.get_emoji_value(ctx.guild.id, emoji),
+            is_ignored=lambda channel_id: self._is_ignored(ctx.guild.id, channel_id),
+            concurrency=RECOMPUTE_CONCURRENCY,
+            batch_size=RECOMPUTE_BATCH_SIZE,
         )
 
-        if not embeds:
-            await ctx.reply(_(ctx, "Karma data not yet available."))
-            return
+        self._recomputing.add(ctx.guild.id)
+        self._counting_history.add(ctx.guild.id)
+        try:
+            channels = await recompute.get_channels()
+            await ctx.reply(
+                _(
+                    ctx,
+                    "Recomputing karma from {count} channels and threads, archived too.",
+                ).format(count=len(channels))
+            )
+            if recompute.skipped_count:
+                await ctx.reply(
+                    _(
+                        ctx,
+                        "Karma from {count} channels the bot can't read will be lost.",
+                    ).format(count=recompute.skipped_count)
+                )
+            await guild_log.warning(ctx.author, ctx.channel, "Karma recompute started.")
+
+            # Deltas waiting in the cache are older than the recomputed karma
+            await self._karma_cache_save("recompute")
+            try:
+                await recompute.run(channels)
+            except KarmaRecomputeError as exc:
+                await ctx.reply(
+                    _(
+                        ctx,
+                        "Karma recompute failed in {channel}, run it again to continue.",
+                    ).format(channel=exc.channel.mention)
+                )
+                await guild_log.error(
+                    ctx.author,
+                    ctx.channel,
+                    f"Karma recompute failed in channel {exc.channel.id}.",
+                    exception=exc.__cause__,
+                )
+                return
 
-        scrollable = utils.ScrollableEmbed(ctx, embeds)
-        await scrollable.scroll()
+            # The swap must not land between transactions of a flush
+            async with self._flush_lock:
+                # Deltas of reactions that were already being processed
+                if self.karma_cache.discard_guild(ctx.guild.id):
+                    await self.journal.rewrite(
+                        [
+                            (self.journal.sequence, key, delta)
+                            for key, delta in self.karma_cache.items()
+                        ],
+                        sequence=self.journal.sequence,
+                    )
+                count: int = recompute.swap(self.decay.factor())
+        finally:
+            self._counting_history.discard(ctx.guild.id)
+            self._recomputing.discard(ctx.guild.id)
+
+        self.rankings.clear(ctx.guild.id)
+        self.board_cache.invalidate(ctx.guild.id)
 
-    @check.acl2(check.ACLevel.MEMBER)
-    @karma_.command(name="givingboard")
-    async def karma_givingboard(self, ctx):
-        """Display karma givers."""
-        embeds = Karma._create_embeds(
-            ctx=ctx,
-            title=_(ctx, "Karma givingboard"),
-            description=_(ctx, "Score, descending"),
-            board=BoardType.given,
-            order=BoardOrder.DESC,
+        await ctx.reply(
+            _(
+                ctx,
+                "Karma of {members} members was recomputed from {messages} messages.",
+            ).format(members=count, messages=recompute.message_count)
+        )
+        await guild_log.warning(
+            ctx.author,
+            ctx.channel,
+            f"Karma recomputed from {recompute.message_count} messages, "
+            f"{count} members.",
         )
 
-        if not embeds:
-            await ctx.reply(_(ctx, "Karma data not yet available."))
+    @check.acl2(check.ACLevel.GUILD_OWNER)
+    @karma_recompute.command(name="discard")
+    async def karma_recompute_discard(self, ctx):
+        """Drop progress of the interrupted recompute."""
+        if ctx.guild.id in self._recomputing:
+            await ctx.reply(_(ctx, "Karma is already being recomputed."))
             return
 
-        scrollable = utils.ScrollableEmbed(ctx, embeds)
-        await scrollable.scroll()
+        KarmaRecomputeMember.discard(ctx.guild.id)
+        await ctx.reply(_(ctx, "Karma recompute progress was discarded."))
+        await guild_log.info(ctx.author, ctx.channel, "Karma recompute discarded.")
 
-    @check.acl2(check.ACLevel.MEMBER)
-    @karma_.command(name="takingboard")
-    async def karma_takingboard(self, ctx):
-        """Display karma takers."""
-        embeds = Karma._create_embeds(
-            ctx=ctx,
-            title=_(ctx, "Karma takingboard"),
-            description=_(ctx, "Score, descending"),
-            board=BoardType.taken,
-            order=BoardOrder.DESC,
-        )
+    @check.acl2(check.ACLevel.MOD)
+    @karma_.command(name="export")
+    async def karma_export(self, ctx, format: Literal["jsonl", "csv"] = "jsonl"):
+        """Export karma of all members to a file.
 
-        if not embeds:
-            await ctx.reply(_(ctx, "Karma data not yet available."))
-            return
+        Args:
+            format: File format, jsonl or csv.
+        """
+        # Include deltas that were not saved yet
+        await self._karma_cache_save("export")
 
-        scrollable = utils.ScrollableEmbed(ctx, embeds)
-        await scrollable.scroll()
+        with tempfile.TemporaryFile(mode="w+b") as file:
+            handle = io.TextIOWrapper(file, encoding="utf-8", newline="")
+            count: int = await write_members(ctx.guild.id, handle, format)
+            handle.detach()
 
-    @check.acl2(check.ACLevel.SUBMOD)
-    @karma_.group(name="ignore")
-    async def karma_ignore(self, ctx):
-        """Manage channels where karma is disabled."""
-        await utils.discord.send_help(ctx)
+            if file.tell() > ctx.guild.filesize_limit:
+                await ctx.reply(_(ctx, "The export is too big to be uploaded."))
+                return
 
-    @check.acl2(check.ACLevel.SUBMOD)
-    @karma_ignore.command(name="list")
-    async def karma_ignore_list(self, ctx):
-        """List channels where karma is disabled."""
-        ignored_channels = IgnoredChannel.get_all(ctx.guild.id)
-        if not ignored_channels:
-            await ctx.reply(_(ctx, "Karma is not ignored in any of the channels."))
-            return
+            file.seek(0)
+            await ctx.reply(
+                _(ctx, "Karma of {count} members was exported.").format(count=count),
+                file=discord.File(file, filename=f"karma-{ctx.guild.id}.{format}"),
+            )
 
-        channels = [ctx.guild.get_channel(c.channel_id) for c in ignored_channels]
+        await guild_log.info(
+            ctx.author, ctx.channel, f"Karma of {count} members exported."
+        )
+
+    @check.acl2(check.ACLevel.GUILD_OWNER)
+    @karma_.command(name="import")
+    async def karma_import(self, ctx):
+        """Overwrite karma of members from the attached file.
+
+        The file has the format of karma export, JSONL or CSV. Members that
+        are not in the file keep their karma. Imported karma decays as if it
+        was received now.
+        """
+        if not ctx.message.attachments:
+            await ctx.reply(_(ctx, "You have to attach the exported file."))
+            return
+
+        attachment: discord.Attachment = ctx.message.attachments[0]
+        format: str = os.path.splitext(attachment.filename)[1][1:].lower()
+        if format not in FORMATS:
+            await ctx.reply(_(ctx, "The file has to be JSONL or CSV."))
+            return
+
+        if ctx.guild.id in self._recomputing:
+            await ctx.reply(_(ctx, "Karma is already being recomputed."))
+            return
+
+        self._recomputing.add(ctx.guild.id)
+        try:
+            with tempfile.TemporaryFile(mode="w+b") as file:
+                async with aiohttp.ClientSession() as http:
+                    async with http.get(attachment.url) as response:
+                        response.raise_for_status()
+                        async for data in response.content.iter_chunked(64 * 1024):
+                            file.write(data)
+                file.seek(0)
+
+                try:
+                    await self._check_members(file, format)
+                except KarmaTransferError as exc:
+                    await ctx.reply(
+                        _(ctx, "Invalid line {line}, nothing was imported.").format(
+                            line=exc.line
+                        )
+                    )
+                    return
+
+                # Deltas waiting in the cache are older than the imported karma
+                await self._karma_cache_save("import")
+                async with self._flush_lock:
+                    count: int = await self._import_members(ctx.guild.id, file, format)
+        finally:
+            self._recomputing.discard(ctx.guild.id)
+            self.rankings.clear(ctx.guild.id)
+            self.board_cache.invalidate(ctx.guild.id)
+
+        await ctx.reply(
+            _(ctx, "Karma of {count} members was imported.").format(count=count)
+        )
+        await guild_log.warning(
+            ctx.author, ctx.channel, f"Karma of {count} members imported."
+        )
+
+    @check.acl2(check.ACLevel.MOD)
+    @karma_.command(name="diagnostics")
+    async def karma_diagnostics(self, ctx):
+        """Display state of the karma cache and its flushing."""
+        embed = utils.discord.create_embed(
+            author=ctx.author,
+            title=_(ctx, "Karma diagnostics"),
+        )
+
+        embed.add_field(
+            name=_(ctx, "Flush policy"),
+            value=(
+                f"{FLUSH_MAX_KEYS} keys | {FLUSH_MAX_AGE:.0f} s | "
+                f"{FLUSH_MAX_MEMORY // 1024} kB\n"
+                f"{FLUSH_CHUNK_SIZE} keys per transaction"
+            ),
+            inline=False,
+        )
+
+        age: float = 0.0
+        if self.karma_cache.dirty_since is not None:
+            age = time.monotonic() - self.karma_cache.dirty_since
+        embed.add_field(
+            name=_(ctx, "Karma cache"),
+            value=(
+                f"{len(self.karma_cache)} keys | {age:.0f} s | "
+                f"{self.karma_cache.memory_size() // 1024} kB"
+            ),
+            inline=False,
+        )
+
+        last_flush: str = _(ctx, "The cache was not saved yet.")
+        if self.last_flush is not None:
+            last_flush = (
+                f"{self.last_flush.reason}: {self.last_flush.keys} keys, "
+                f"{self.last_flush.chunks} transactions, "
+                f"{self.last_flush.duration * 1000:.0f} ms, "
+                f"<t:{int(self.last_flush.finished)}:R>"
+            )
+        embed.add_field(name=_(ctx, "Last flush"), value=last_flush, inline=False)
+
+        embed.add_field(
+            name=_(ctx, "Rate limited reactions"),
+            value=(
+                f"{self.reaction_limiter.dropped.get(ctx.guild.id, 0)} | "
+                f"{REACTION_LIMIT_BURST} + {REACTION_LIMIT_RATE}/s"
+            ),
+            inline=False,
+        )
+
+        await ctx.reply(embed=embed)
+
+    @check.acl2(check.ACLevel.MOD)
+    @karma_.group(name="metrics")
+    async def karma_metrics(self, ctx):
+        """Manage karma performance metrics."""
+        await utils.discord.send_help(ctx)
+
+    @check.acl2(check.ACLevel.MOD)
+    @karma_metrics.command(name="show")
+    async def karma_metrics_show(self, ctx):
+        """Display latencies and counters of karma processing."""
+        histograms: List[str] = [
+            f"{name:<24} n={histogram.count} "
+            f"avg={histogram.total / histogram.count:.1f} "
+            f"p50<={histogram.percentile(50):g} "
+            f"p95<={histogram.percentile(95):g} "
+            f"max={histogram.max:.1f}"
+            for name, histogram in sorted(self.metrics.histograms.items())
+        ]
+        counters: List[str] = [
+            f"{name:<32} {value}"
+            for name, value in sorted(
+                list(self.metrics.counters.items()) + list(self._get_gauges().items())
+            )
+        ]
+
+        embed = utils.discord.create_embed(
+            author=ctx.author,
+            title=_(ctx, "Karma metrics"),
+            description=_(ctx, "Collected since {timestamp}.").format(
+                timestamp=f"<t:{int(self.metrics.started)}:R>"
+            ),
+        )
+        embed.add_field(
+            name=_(ctx, "Latency (ms)"),
+            value="```\n" + ("\n".join(histograms) or "-")[:1000] + "\n```",
+            inline=False,
+        )
+        embed.add_field(
+            name=_(ctx, "Counters"),
+            value="```\n" + ("\n".join(counters) or "-")[:1000] + "\n```",
+            inline=False,
+        )
+        await ctx.reply(embed=embed)
+
+    @check.acl2(check.ACLevel.MOD)
+    @karma_metrics.command(name="dump")
+    async def karma_metrics_dump(self, ctx):
+        """Write karma metrics to a local JSON file."""
+        self.metrics.write(METRICS_PATH, self._get_gauges())
+        await ctx.reply(_(ctx, "Karma metrics were written to the metrics file."))
+        await guild_log.info(
+            ctx.author, ctx.channel, f"Karma metrics written to {METRICS_PATH}."
+        )
+
+    @check.acl2(check.ACLevel.MEMBER)
+    @karma_.command(name="leaderboard")
+    async def karma_leaderboard(
+        self, ctx, period: Optional[Literal["week", "month", "year"]] = None
+    ):
+        """Display karma leaders.
+
+        Args:
+            period: Only count karma of this week, month or year.
+        """
+        if period is None:
+            embeds = self._create_embeds(
+                ctx=ctx,
+                title=_(ctx, "Karma leaderboard"),
+                description=_(ctx, "Score, descending"),
+                board=BoardType.score,
+                order=BoardOrder.DESC,
+            )
+        else:
+            descriptions = {
+                "week": _(ctx, "Score this week, descending"),
+                "month": _(ctx, "Score this month, descending"),
+                "year": _(ctx, "Score this year, descending"),
+            }
+            embeds = self._create_period_embeds(
+                ctx=ctx,
+                title=_(ctx, "Karma leaderboard"),
+                description=descriptions[period],
+                since=Karma._get_period_start(period),
+            )
+
+        if not embeds:
+            await ctx.reply(_(ctx, "Karma data not yet available."))
+            return
+
+        scrollable = utils.ScrollableEmbed(ctx, embeds)
+        await scrollable.scroll()
+
+    @check.acl2(check.ACLevel.MEMBER)
+    @karma_.command(name="loserboard")
+    async def karma_loserboard(self, ctx):
+        """Display karma losers."""
+        embeds = self._create_embeds(
+            ctx=ctx,
+            title=_(ctx, "Karma loserboard"),
+            description=_(ctx, "Score, ascending"),
+            board=BoardType.score,
+            order=BoardOrder.ASC,
+        )
+
+        if not embeds:
+            await ctx.reply(_(ctx, "Karma data not yet available."))
+            return
+
+        scrollable = utils.ScrollableEmbed(ctx, embeds)
+        await scrollable.scroll()
+
+    @check.acl2(check.ACLevel.MEMBER)
+    @karma_.command(name="givingboard")
+    async def karma_givingboard(self, ctx):
+        """Display karma givers."""
+        embeds = self._create_embeds(
+            ctx=ctx,
+            title=_(ctx, "Karma givingboard"),
+            description=_(ctx, "Score, descending"),
+            board=BoardType.given,
+            order=BoardOrder.DESC,
+        )
+
+        if not embeds:
+            await ctx.reply(_(ctx, "Karma data not yet available."))
+            return
+
+        scrollable = utils.ScrollableEmbed(ctx, embeds)
+        await scrollable.scroll()
+
+    @check.acl2(check.ACLevel.MEMBER)
+    @karma_.command(name="takingboard")
+    async def karma_takingboard(self, ctx):
+        """Display karma takers."""
+        embeds = self._create_embeds(
+            ctx=ctx,
+            title=_(ctx, "Karma takingboard"),
+            description=_(ctx, "Score, descending"),
+            board=BoardType.taken,
+            order=BoardOrder.DESC,
+        )
+
+        if not embeds:
+            await ctx.reply(_(ctx, "Karma data not yet available."))
+            return
+
+        scrollable = utils.ScrollableEmbed(ctx, embeds)
+        await scrollable.scroll()
+
+    @check.acl2(check.ACLevel.MEMBER)
+    @karma_.command(name="around")
+    async def karma_around(self, ctx, member: Optional[discord.Member] = None):
+        """Display karma leaderboard around some user."""
+        if member is None:
+            member = ctx.author
+
+        kmember = KarmaMember.get(ctx.guild.id, member.id)
+        if kmember is None:
+            await ctx.reply(
+                _(ctx, "{member} does not have any karma yet.").format(
+                    member=utils.text.sanitise(member.display_name)
+                )
+            )
+            return
+
+        position: int = self.rankings.position(
+            ctx.guild.id, BoardType.score, kmember.score
+        )
+        embed = utils.discord.create_embed(
+            author=ctx.author,
+            title=_(ctx, "Karma leaderboard"),
+            description=_(
+                ctx, "{member} is #{position} with {value} karma points."
+            ).format(
+                member=utils.text.sanitise(member.display_name),
+                position=position,
+                value=self.decay.value(kmember.score),
+            ),
+        )
+
+        view = KarmaBoardView(
+            ctx=ctx,
+            embed=embed,
+            field_name=_(ctx, "Score, descending"),
+            board=BoardType.score,
+            order=BoardOrder.DESC,
+            get_value=lambda score: self.decay.value(score),
+        )
+        view.load_around((kmember.score, kmember.user_id))
+        view.message = await ctx.reply(embed=view.get_embed(), view=view)
+
+    @check.acl2(check.ACLevel.SUBMOD)
+    @karma_.group(name="ignore")
+    async def karma_ignore(self, ctx):
+        """Manage channels where karma is disabled."""
+        await utils.discord.send_help(ctx)
+
+    @check.acl2(check.ACLevel.SUBMOD)
+    @karma_ignore.command(name="list")
+    async def karma_ignore_list(self, ctx):
+        """List channels where karma is disabled."""
+        ignored_channels = self.ignored_channels.get(ctx.guild.id)
+        if not ignored_channels:
+            await ctx.reply(_(ctx, "Karma is not ignored in any of the channels."))
+            return
+
+        channels = [ctx.guild.get_channel(c) for c in sorted(ignored_channels)]
 
         table_pages: List[str] = utils.text.create_table(
             channels,
@@ -672,6 +1578,7 @@ class Karma(commands.Cog):
     async def karma_ignore_set(self, ctx, channel: discord.TextChannel):
         """Ignore karma in supplied channel."""
         ignored_channel = IgnoredChannel.add(ctx.guild.id, channel.id)
+        self.ignored_channels.setdefault(ctx.guild.id, set()).add(channel.id)
         if ignored_channel is None:
             await ctx.reply(_(ctx, "Karma is already ignored in that channel."))
             return
@@ -690,7 +1597,8 @@ class Karma(commands.Cog):
     async def karma_ignore_unset(self, ctx, channel: discord.TextChannel):
         """Stop ignoring karma in supplied channel."""
         unignored_channel = IgnoredChannel.remove(ctx.guild.id, channel.id)
-        if unignored_channel is None:
+        self.ignored_channels.get(ctx.guild.id, set()).discard(channel.id)
+        if not unignored_channel:
             await ctx.reply(_(ctx, "Karma is not ignored in that channel."))
             return
 
@@ -705,6 +1613,188 @@ class Karma(commands.Cog):
 
     # Functions
 
+    async def _finish_votes(self, idxs: List[int]):
+        """Evaluate ended votes.
+
+        :param idxs: IDs of the ended votes
+        """
+        votes: List[KarmaVote] = KarmaVote.get_all(idxs)
+        results = await asyncio.gather(
+            *[self._finish_vote(vote) for vote in votes], return_exceptions=True
+        )
+        for vote, result in zip(votes, results):
+            if isinstance(result, Exception):
+                await bot_log.error(
+                    None,
+                    None,
+                    f"Karma vote over emoji '{vote.emoji}' could not be evaluated.",
+                    exception=result,
+                )
+
+        KarmaVote.remove_many(idxs)
+
+    async def _finish_vote(self, vote: KarmaVote):
+        """Count the votes and set the emoji value.
+
+        :param vote: Ended karma vote
+        """
+        guild: Optional[discord.Guild] = self.bot.get_guild(vote.guild_id)
+        channel = guild.get_channel_or_thread(vote.channel_id) if guild else None
+        if channel is None:
+            await bot_log.warning(
+                None,
+                None,
+                f"Channel of karma vote over emoji '{vote.emoji}' not found.",
+            )
+            return
+
+        emoji: Union[discord.Emoji, str] = vote.emoji
+        if vote.emoji.isdigit():
+            emoji = self.bot.get_emoji(int(vote.emoji))
+            if emoji is None:
+                await guild_log.info(
+                    None,
+                    channel,
+                    f"Emoji {vote.emoji} of karma vote not found, aborted.",
+                )
+                return
+        emoji_name: str = getattr(emoji, "name", str(emoji))
+        author: Optional[discord.Member] = guild.get_member(vote.author_id)
+        gtx = i18n.TranslationContext(guild.id, None)
+
+        try:
+            vote_message = await channel.fetch_message(vote.message_id)
+        except discord.HTTPException:
+            await guild_log.info(
+                author,
+                channel,
+                f"Message of karma vote over emoji '{emoji_name}' not found, aborted.",
+            )
+            return
+
+        votes = {option: 0 for option in VOTE_OPTIONS.keys()}
+        for reaction in vote_message.reactions:
+            if str(reaction.emoji) not in votes.keys():
+                continue
+            votes[reaction.emoji] = reaction.count - 1
+
+        log_message: str = (
+            f"Karma vote over emoji '{emoji_name}' ended: "
+            + ", ".join(f"{v}x {VOTE_OPTIONS[k]}" for k, v in votes.items())
+            + "."
+        )
+
+        if sum(votes.values()) < vote.voter_limit:
+            await guild_log.info(
+                author,
+                channel,
+                log_message + " Not enough votes, aborted.",
+            )
+            await channel.send(
+                _(gtx, "Vote over {emoji} failed (not enough votes).").format(
+                    emoji=str(emoji)
+                )
+            )
+            return
+
+        result: Optional[int] = None
+        if votes["🔼"] > votes["0⃣"] and votes["🔼"] > votes["🔽"]:
+            result = 1
+        elif votes["0⃣"] > votes["🔽"] and votes["0⃣"] > votes["🔼"]:
+            result = 0
+        elif votes["🔽"] > votes["0⃣"] and votes["🔽"] > votes["🔼"]:
+            result = -1
+        else:
+            await guild_log.info(
+                author,
+                channel,
+                log_message + " Inconclusive, aborted.",
+            )
+            await channel.send(
+                _(gtx, "Vote over {emoji} ended in a draw.").format(emoji=str(emoji))
+            )
+            return
+
+        self._set_emoji_value(guild.id, Karma.get_emoji_key(emoji), result)
+
+        await guild_log.info(author, channel, log_message + f" Setting to {result}.")
+        await channel.send(
+            _(gtx, "Karma value of {emoji} is **{value}**.").format(
+                emoji=str(emoji), value=result
+            )
+        )
+
+    def _debounce_reaction(self, reaction: discord.RawReactionActionEvent, added: bool):
+        """Hold the reaction back for the debounce window.
+
+        If the opposite event of the same reaction is already waiting,
+        they cancel each other out and neither is processed. Reactions in
+        ignored channels and reactions without karma value are dropped
+        right away, before anything is scheduled.
+
+        :param reaction: Raw Reaction event to process.
+        :param added: If the reaction was added or removed.
+        """
+        self.metrics.increment("reaction.events")
+        if self._is_ignored(reaction.guild_id, reaction.channel_id):
+            self.metrics.increment("reaction.ignored_channel")
+            return
+        if self.get_emoji_value(reaction.guild_id, reaction.emoji) == 0:
+            self.metrics.increment("reaction.zero_value")
+            return
+
+        if self.debounce_window <= 0:
+            self._start_processing(reaction, added)
+            return
+
+        key = (
+            reaction.message_id,
+            reaction.user_id,
+            Karma.get_emoji_key(reaction.emoji),
+        )
+        pending = self._pending_reactions.get(key)
+        if pending is not None:
+            pending_handle, pending_added = pending[0], pending[2]
+            pending_handle.cancel()
+            if pending_added != added:
+                del self._pending_reactions[key]
+                self.metrics.increment("reaction.debounce_cancelled")
+                return
+            # Duplicate event, don't hold back the previous one any longer
+            self._release_reaction(key)
+
+        handle = asyncio.get_running_loop().call_later(
+            self.debounce_window, self._release_reaction, key
+        )
+        self._pending_reactions[key] = (handle, reaction, added)
+
+    def _release_reaction(self, key: Tuple[int, int, Union[int, str]]):
+        """Process the reaction that survived the debounce window."""
+        handle, reaction, added = self._pending_reactions.pop(key)
+        self._start_processing(reaction, added)
+
+    def _start_processing(self, reaction: discord.RawReactionActionEvent, added: bool):
+        """Run the reaction processing in the background."""
+        task = asyncio.create_task(self._try_process_reaction(reaction, added))
+        self._reaction_tasks.add(task)
+        task.add_done_callback(self._reaction_tasks.discard)
+
+    async def _try_process_reaction(
+        self, reaction: discord.RawReactionActionEvent, added: bool
+    ):
+        """Process the reaction and log errors, as nobody awaits the task."""
+        try:
+            with self.metrics.timer("reaction"):
+                await self._process_reaction(reaction=reaction, added=added)
+        except Exception as exc:
+            self.metrics.increment("reaction.errors")
+            await guild_log.error(
+                reaction.user_id,
+                reaction.channel_id,
+                f"Could not process karma reaction on message {reaction.message_id}.",
+                exception=exc,
+            )
+
     async def _process_reaction(
         self, reaction: discord.RawReactionActionEvent, added: bool
     ):
@@ -712,59 +1802,118 @@ class Karma(commands.Cog):
 
         :param reaction: Raw Reaction event to process.
         :param added: If the reaction was added or removed."""
-        if IgnoredChannel.get(reaction.guild_id, reaction.channel_id):
+        emoji_value: int = self.get_emoji_value(reaction.guild_id, reaction.emoji)
+
+        # The emoji value may have been unset during the debounce window
+        if emoji_value == 0:
+            self.metrics.increment("reaction.zero_value")
             return
 
-        emoji_value: int = Karma.get_emoji_value(reaction.guild_id, reaction.emoji)
+        # History of the guild is being counted, the reaction would be either
+        # counted twice or overwritten by the recompute
+        if reaction.guild_id in self._counting_history:
+            self.metrics.increment("reaction.recomputing")
+            return
 
-        if emoji_value == 0:
+        if not self.reaction_limiter.allow(
+            reaction.guild_id,
+            reaction.user_id,
+            (reaction.message_id, Karma.get_emoji_key(reaction.emoji)),
+            added,
+        ):
+            self.metrics.increment("reaction.rate_limited")
             return
 
         starboard: Starboard = self.bot.get_cog("Starboard")
         if starboard and reaction.channel_id in starboard.source_channels:
+            self.metrics.increment("db.starboard_lookups")
             source_messages: StarboardMessage = StarboardMessage.get_all(
                 guild_id=reaction.guild_id, source_message_id=reaction.message_id
             )
             if source_messages:
+                self.metrics.increment("reaction.starboard_checks")
                 duplicate = await starboard._check_duplicate(
                     reaction, source_messages[0], is_source=True
                 )
                 if duplicate:
+                    self.metrics.increment("reaction.starboard_duplicates")
                     return
 
-        message: discord.Message = None
-        try:
-            message = await utils.discord.get_message(
-                self.bot,
-                reaction.guild_id,
-                reaction.channel_id,
-                reaction.message_id,
-            )
-        except discord.NotFound:
-            pass
+        msg_author_id: Optional[int] = self._get_message_author(reaction)
+        if msg_author_id is None:
+            self.metrics.increment("api.message_fetches")
+            with self.metrics.timer("reaction.message_fetch"):
+                msg_author_id = await self._fetch_message_author(reaction)
 
-        if message is None:
+        if msg_author_id is None:
+            self.metrics.increment("reaction.message_missing")
             await guild_log.debug(
                 reaction.user_id,
                 reaction.channel_id,
                 f"Message {reaction.message_id} not found on karma reaction add.",
             )
             return
+
+        self.metrics.increment("reaction.counted")
+        self.emoji_usage.add(
+            reaction.guild_id, Karma.get_emoji_key(reaction.emoji), added
+        )
         if added:
             self.reaction_added(
                 guild_id=reaction.guild_id,
-                msg_author_id=message.author.id,
+                msg_author_id=msg_author_id,
                 react_author_id=reaction.user_id,
                 emoji_value=emoji_value,
             )
         else:
             self.reaction_removed(
                 guild_id=reaction.guild_id,
-                msg_author_id=message.author.id,
+                msg_author_id=msg_author_id,
                 react_author_id=reaction.user_id,
                 emoji_value=emoji_value,
             )
 
+    def _get_message_author(
+        self, reaction: discord.RawReactionActionEvent
+    ) -> Optional[int]:
+        """Get author of the reacted message without calling the API.
+
+        Added reactions carry the author in the event, removed reactions
+        have to be looked up in the message author cache.
+
+        :param reaction: Raw Reaction event.
+        :return: Discord ID of the message author or None if not known.
+        """
+        if reaction.message_author_id is not None:
+            self.message_authors.add(reaction.message_id, reaction.message_author_id)
+            return reaction.message_author_id
+        return self.message_authors.get(reaction.message_id)
+
+    async def _fetch_message_author(
+        self, reaction: discord.RawReactionActionEvent
+    ) -> Optional[int]:
+        """Fetch the reacted message and remember its author.
+
+        :param reaction: Raw Reaction event.
+        :return: Discord ID of the message author or None if not found.
+        """
+        message: discord.Message = None
+        try:
+            message = await utils.discord.get_message(
+                self.bot,
+                reaction.guild_id,
+                reaction.channel_id,
+                reaction.message_id,
+            )
+        except discord.NotFound:
+            pass
+
+        if message is None:
+            return None
+
+        self.message_authors.add(message.id, message.author.id)
+        return message.author.id
+
     def reaction_added(
         self, guild_id: int, msg_author_id: int, react_author_id: int, emoji_value: int
     ):
@@ -778,15 +1927,12 @@ class Karma(commands.Cog):
         msg_author = Karma.get_cache_key(guild_id, msg_author_id)
         react_author = Karma.get_cache_key(guild_id, react_author_id)
 
-        self.value_cache.setdefault(msg_author, 0)
-        self.value_cache[msg_author] += emoji_value
+        self._cache_add(msg_author, value=emoji_value)
 
         if emoji_value > 0:
-            self.given_cache.setdefault(react_author, 0)
-            self.given_cache[react_author] += emoji_value
+            self._cache_add(react_author, given=emoji_value)
         else:
-            self.taken_cache.setdefault(react_author, 0)
-            self.taken_cache[react_author] += -emoji_value
+            self._cache_add(react_author, taken=-emoji_value)
 
     def reaction_removed(
         self, guild_id: int, msg_author_id: int, react_author_id: int, emoji_value: int
@@ -802,20 +1948,112 @@ class Karma(commands.Cog):
         msg_author = Karma.get_cache_key(guild_id, msg_author_id)
         react_author = Karma.get_cache_key(guild_id, react_author_id)
 
-        self.value_cache.setdefault(msg_author, 0)
-        self.value_cache[msg_author] -= emoji_value
+        self._cache_add(msg_author, value=-emoji_value)
 
         if emoji_value > 0:
-            self.given_cache.setdefault(react_author, 0)
-            self.given_cache[react_author] -= emoji_value
+            self._cache_add(react_author, given=-emoji_value)
         else:
-            self.taken_cache.setdefault(react_author, 0)
-            self.taken_cache[react_author] -= -emoji_value
+            self._cache_add(react_author, taken=emoji_value)
 
-    # Static helper functions
+    def _cache_add(
+        self, key: Tuple[int, int], value: int = 0, given: int = 0, taken: int = 0
+    ):
+        """Add karma deltas to the cache and to the journal.
+
+        :param key: (guild_id, user_id) tuple
+        :param value: Karma value delta
+        :param given: Given karma delta
+        :param taken: Taken karma delta
+        """
+        self.karma_cache.add(key, value=value, given=given, taken=taken)
+        self.journal.append(*key, value, given, taken)
+
+    def _is_ignored(self, guild_id: int, channel_id: int) -> bool:
+        """Check if karma is ignored in the channel.
+
+        Threads are ignored when their parent channel is ignored.
+
+        :param guild_id: ID of the guild
+        :param channel_id: ID of the channel or thread
+
+        :return: True if karma is ignored in the channel, False otherwise.
+        """
+        ignored_channels: Set[int] = self.ignored_channels.get(guild_id)
+        if not ignored_channels:
+            return False
+        if channel_id in ignored_channels:
+            return True
+
+        guild: Optional[discord.Guild] = self.bot.get_guild(guild_id)
+        if guild is None:
+            return False
+        thread: Optional[discord.Thread] = guild.get_thread(channel_id)
+        return thread is not None and thread.parent_id in ignored_channels
+
+    def _set_emoji_value(self, guild_id: int, emoji: Union[int, str], value: int):
+        """Set emoji's karma value in the DB and in the emoji cache.
+
+        :param guild_id: ID of the guild
+        :param emoji: Emoji ID (custom emoji) or emoji string (unicode emoji)
+        :param value: Karma value of the emoji
+        """
+        guild_emojis = self.emoji_cache.setdefault(guild_id, {})
+        if isinstance(emoji, int):
+            DiscordEmoji.add(guild_id, emoji, value)
+            guild_emojis[emoji] = value
+            return
+
+        UnicodeEmoji.add(guild_id, emoji, value)
+        if value == 0:
+            # Unicode emojis with zero value are not stored at all
+            guild_emojis.pop(emoji, None)
+        else:
+            guild_emojis[emoji] = value
+
+    def _unset_emoji_value(self, guild_id: int, emoji: Union[int, str]):
+        """Remove emoji's karma value from the DB and from the emoji cache.
+
+        :param guild_id: ID of the guild
+        :param emoji: Emoji ID (custom emoji) or emoji string (unicode emoji)
+        """
+        if isinstance(emoji, int):
+            DiscordEmoji.remove(guild_id, emoji)
+        else:
+            UnicodeEmoji.remove(guild_id, emoji)
+        self.emoji_cache.get(guild_id, {}).pop(emoji, None)
+
+    def get_emoji_value(
+        self, guild_id: int, emoji: Union[discord.PartialEmoji, discord.Emoji, str]
+    ) -> int:
+        """Get's emoji value from the emoji cache (default 0)
+
+        :param guild_id: ID of the guild
+        :param emoji: Partial Emoji to get the karma value.
+
+        :return: Emoji karma value"""
+        emoji_key = Karma.get_emoji_key(emoji)
+        emoji_value: int = self.emoji_cache.get(guild_id, {}).get(emoji_key, 0)
+
+        return emoji_value
+
+    def get_emoji_values(
+        self,
+        guild_id: int,
+        emojis: Iterable[Union[discord.PartialEmoji, discord.Emoji, str]],
+    ) -> List[Optional[int]]:
+        """Get values of multiple emojis from the emoji cache in one pass.
+
+        :param guild_id: ID of the guild
+        :param emojis: Emojis to get the karma values of.
+
+        :return: Emoji karma values in the order of the emojis, None for
+            emojis that don't have karma value set.
+        """
+        guild_emojis: Dict[Union[int, str], int] = self.emoji_cache.get(guild_id, {})
+        return [guild_emojis.get(Karma.get_emoji_key(emoji)) for emoji in emojis]
 
-    @staticmethod
     def _create_embeds(
+        self,
         *,
         ctx: commands.Context,
         title: str,
@@ -825,12 +2063,102 @@ class Karma(commands.Cog):
         item_count: int = 10,
         page_count: int = 10,
     ) -> List[discord.Embed]:
-        """Helper function that generates Karma embed."""
-        pages: List[discord.Embed] = []
+        """Helper function that generates Karma embed.
 
-        author = KarmaMember.get(ctx.guild.id, ctx.author.id)
-        guild_limit: int = KarmaMember.get_count(ctx.guild.id)
-        limit: int = min(guild_limit, page_count * item_count)
+        The top of the board is loaded in one query together with the
+        author's row and cached, so repeated calls don't touch the database.
+        Scores are cached as they are and turned into decayed values here.
+        """
+        users: Optional[List[Tuple[int, int]]] = self.board_cache.get(
+            ctx.guild.id, board, order
+        )
+        author: Optional[Tuple[int, int]] = None
+        if users is None:
+            rows = KarmaMember.get_board(
+                ctx.guild.id, board, order, page_count * item_count, ctx.author.id
+            )
+            users = []
+            for position, user_id, value in rows:
+                if position <= page_count * item_count:
+                    users.append((user_id, value))
+                if user_id == ctx.author.id:
+                    author = (user_id, value)
+            self.board_cache.set(ctx.guild.id, board, order, users)
+        else:
+            author = next((u for u in users if u[0] == ctx.author.id), None)
+            if author is None:
+                value = self.rankings.get(ctx.guild.id, board).get(ctx.author.id)
+                if value is not None:
+                    author = (ctx.author.id, value)
+
+        if board == BoardType.score:
+            factor: float = self.decay.factor()
+            users = [(user_id, round(score / factor)) for user_id, score in users]
+            if author is not None:
+                author = (author[0], round(author[1] / factor))
+
+        return Karma._create_board_pages(
+            ctx=ctx,
+            title=title,
+            description=description,
+            order=order,
+            users=users,
+            author=author,
+            item_count=item_count,
+            page_count=page_count,
+        )
+
+    def _create_period_embeds(
+        self,
+        *,
+        ctx: commands.Context,
+        title: str,
+        description: str,
+        since: date,
+        item_count: int = 10,
+        page_count: int = 10,
+    ) -> List[discord.Embed]:
+        """Helper function that generates Karma embed from the ledger.
+
+        Karma that was not flushed to the database yet is not included.
+        """
+        users: List[Tuple[int, int]] = KarmaLedger.get_board(
+            ctx.guild.id, BoardType.value, since, page_count * item_count
+        )
+        author = next((u for u in users if u[0] == ctx.author.id), None)
+
+        return Karma._create_board_pages(
+            ctx=ctx,
+            title=title,
+            description=description,
+            order=BoardOrder.DESC,
+            users=users,
+            author=author,
+            item_count=item_count,
+            page_count=page_count,
+        )
+
+    # Static helper functions
+
+    @staticmethod
+    def _create_board_pages(
+        *,
+        ctx: commands.Context,
+        title: str,
+        description: str,
+        order: BoardOrder,
+        users: List[Tuple[int, int]],
+        author: Optional[Tuple[int, int]],
+        item_count: int,
+        page_count: int,
+    ) -> List[discord.Embed]:
+        """Split the board into embed pages.
+
+        :param users: List of (user_id, value) tuples ordered by position.
+        :param author: (user_id, value) tuple of the invoking member or None.
+        """
+        pages: List[discord.Embed] = []
+        limit: int = len(users)
 
         embed = utils.discord.create_embed(
             author=ctx.author,
@@ -839,14 +2167,10 @@ class Karma(commands.Cog):
         )
 
         for page_number in range(page_count):
-            users = KarmaMember.get_list(
-                ctx.guild.id,
-                board,
-                order,
-                item_count,
-                item_count * page_number,
-            )
-            if not users:
+            page_users = users[
+                item_count * page_number : item_count * (page_number + 1)
+            ]
+            if not page_users:
                 break
 
             page = embed.copy()
@@ -859,16 +2183,14 @@ class Karma(commands.Cog):
 
             page.add_field(
                 name=page_title,
-                value=Karma._create_embed_page(users, ctx.author, ctx.guild, board),
+                value=Karma._create_embed_page(page_users, ctx.author, ctx.guild),
                 inline=False,
             )
 
-            if author and ctx.author.id not in [u.user_id for u in users]:
+            if author and ctx.author.id not in [u[0] for u in page_users]:
                 page.add_field(
                     name=_(ctx, "Your score"),
-                    value=Karma._create_embed_page(
-                        [author], ctx.author, ctx.guild, board
-                    ),
+                    value=Karma._create_embed_page([author], ctx.author, ctx.guild),
                     inline=False,
                 )
 
@@ -878,35 +2200,77 @@ class Karma(commands.Cog):
 
     @staticmethod
     def _create_embed_page(
-        users: List[KarmaMember],
+        users: List[Tuple[int, int]],
         author: discord.Member,
         guild: discord.Guild,
-        board: BoardType,
     ) -> str:
-        """Helper function that generates Karma embed page."""
+        """Helper function that generates Karma embed page.
+
+        :param users: List of (user_id, value) tuples.
+        """
         result = []
         line_template = "`{value:>6}` … {name}"
         utx = i18n.TranslationContext(guild.id, author.id)
 
-        for user in users:
-            member = guild.get_member(user.user_id)
+        for user_id, value in users:
+            member = guild.get_member(user_id)
             if member and member.display_name:
                 name = utils.text.sanitise(member.display_name, limit=32)
             else:
                 name = _(utx, "Unknown member")
 
-            if user.user_id == author.id:
+            if user_id == author.id:
                 name = f"**{name}**"
 
-            result.append(
-                line_template.format(
-                    value=getattr(user, board.name),
-                    name=name,
-                )
-            )
+            result.append(line_template.format(value=value, name=name))
 
         return "\n".join(result)
 
+    @staticmethod
+    def _pack_emoji_lists(
+        sections: List[Tuple[str, List[str]]], per_line: int = 8
+    ) -> List[str]:
+        """Pack titled emoji lists into as few messages as possible.
+
+        :param sections: List of (title, emojis) tuples. Empty sections are skipped.
+        :param per_line: Number of emojis on one line.
+
+        :return: Message contents not longer than Discord's message limit.
+        """
+        lines: List[str] = []
+        for title, emojis in sections:
+            if not emojis:
+                continue
+            lines.append(f"**{title}**")
+            for i in range(0, len(emojis), per_line):
+                lines.append(" ".join(emojis[i : i + per_line]))
+
+        messages: List[str] = []
+        content: str = ""
+        for line in lines:
+            if content and len(content) + 1 + len(line) > MESSAGE_LENGTH_LIMIT:
+                messages.append(content)
+                content = line
+            else:
+                content = f"{content}\n{line}" if content else line
+        if content:
+            messages.append(content)
+
+        return messages
+
+    @staticmethod
+    def _get_period_start(period: str) -> date:
+        """Get the first day of the current week, month or year (UTC).
+
+        :param period: One of ``week``, ``month`` or ``year``
+        """
+        today: date = datetime.now(timezone.utc).date()
+        if period == "week":
+            return today - timedelta(days=today.weekday())
+        if period == "month":
+            return today.replace(day=1)
+        return today.replace(month=1, day=1)
+
     @staticmethod
     def _get_karma_vote_config(guild: discord.Guild) -> Tuple[str, int, int]:
         """Based on guild size, determine vote parameters.
@@ -933,31 +2297,22 @@ class Karma(commands.Cog):
         return ("large", 180, 15)
 
     @staticmethod
-    def get_emoji_value(
-        guild_id: int, emoji: Union[discord.PartialEmoji, discord.Emoji, str]
-    ) -> int:
-        """Get's emoji value from DB (default 0)
+    def get_emoji_key(
+        emoji: Union[discord.PartialEmoji, discord.Emoji, str],
+    ) -> Union[int, str]:
+        """Prepares key for emoji cache.
 
-        :param guild_id: ID of the guild
-        :param emoji: Partial Emoji to get the karma value.
-
-        :return: Emoji karma value"""
+        :param emoji: Emoji to get the key for.
 
+        :return: Emoji ID for custom emojis, emoji string for unicode emojis.
+        """
         if isinstance(emoji, str):
-            db_emoji = UnicodeEmoji.get(guild_id, emoji)
-        elif isinstance(emoji, discord.PartialEmoji):
-            if emoji.is_custom_emoji():
-                db_emoji = DiscordEmoji.get(guild_id, emoji.id)
-            else:
-                db_emoji = UnicodeEmoji.get(guild_id, emoji.name)
-        else:
-            if getattr(emoji, "id", None) is not None:
-                db_emoji = DiscordEmoji.get(guild_id, emoji.id)
-            else:
-                db_emoji = UnicodeEmoji.get(guild_id, emoji.name)
-        emoji_value: int = getattr(db_emoji, "value", 0)
-
-        return emoji_value
+            return emoji
+        if isinstance(emoji, discord.PartialEmoji):
+            return emoji.id if emoji.is_custom_emoji() else emoji.name
+        if getattr(emoji, "id", None) is not None:
+            return emoji.id
+        return emoji.name
 
     @staticmethod
     def get_cache_key(guild_id: int, user_id: int) -> Tuple[int, int]:
@@ -969,5 +2324,120 @@ class Karma(commands.Cog):
         return (guild_id, user_id)
 
 
+class KarmaBoardView(discord.ui.View):
+    """Karma board that can be scrolled without limits.
+
+    Pages are loaded with keyset pagination on (value, user_id), so every
+    page costs the same no matter how far it is from the top. Board values
+    are kept as they are loaded, ``get_value`` turns them into the displayed
+    ones (e.g. scores into decayed karma).
+    """
+
+    def __init__(
+        self,
+        *,
+        ctx: commands.Context,
+        embed: discord.Embed,
+        field_name: str,
+        board: BoardType,
+        order: BoardOrder,
+        item_count: int = 10,
+        timeout: float = 300,
+        get_value: Optional[Callable[[float], int]] = None,
+    ):
+        super().__init__(timeout=timeout)
+        self.ctx: commands.Context = ctx
+        self.embed: discord.Embed = embed
+        self.field_name: str = field_name
+        self.board: BoardType = board
+        self.order: BoardOrder = order
+        self.item_count: int = item_count
+        self.get_value: Optional[Callable[[float], int]] = get_value
+        self.users: List[Tuple[int, int]] = []
+        self.message: Optional[discord.Message] = None
+
+    @property
+    def reverse_order(self) -> BoardOrder:
+        if self.order == BoardOrder.ASC:
+            return BoardOrder.DESC
+        return BoardOrder.ASC
+
+    def _get_page(
+        self, key: Tuple[int, int], limit: int, forward: bool
+    ) -> List[Tuple[int, int]]:
+        """Load page of (user_id, value) tuples following or preceding the key."""
+        members = KarmaMember.get_list(
+            self.ctx.guild.id,
+            self.board,
+            self.order if forward else self.reverse_order,
+            limit,
+            after=key,
+        )
+        users = [(m.user_id, getattr(m, self.board.name)) for m in members]
+        if not forward:
+            users.reverse()
+        return users
+
+    def load_around(self, key: Tuple[int, int]):
+        """Load page with the (value, user_id) key in the middle."""
+        before: int = self.item_count // 2
+        after: int = self.item_count - before - 1
+        value, user_id = key
+        self.users = (
+            self._get_page(key, before, forward=False)
+            + [(user_id, value)]
+            + self._get_page(key, after, forward=True)
+        )
+
+    def get_embed(self) -> discord.Embed:
+        users: List[Tuple[int, int]] = self.users
+        if self.get_value is not None:
+            users = [(user_id, self.get_value(value)) for user_id, value in users]
+
+        embed = self.embed.copy()
+        embed.add_field(
+            name=self.field_name,
+            value=Karma._create_embed_page(users, self.ctx.author, self.ctx.guild),
+            inline=False,
+        )
+        return embed
+
+    async def interaction_check(self, itx: discord.Interaction) -> bool:
+        return itx.user.id == self.ctx.author.id
+
+    async def _scroll(self, itx: discord.Interaction, forward: bool):
+        if not self.users:
+            await itx.response.defer()
+            return
+
+        if forward:
+            user_id, value = self.users[-1]
+        else:
+            user_id, value = self.users[0]
+        users = self._get_page((value, user_id), self.item_count, forward)
+        if not users:
+            await itx.response.defer()
+            return
+
+        self.users = users
+        await itx.response.edit_message(embed=self.get_embed(), view=self)
+
+    @discord.ui.button(emoji="🔼", style=discord.ButtonStyle.secondary)
+    async def scroll_up(self, itx: discord.Interaction, button: discord.ui.Button):
+        await self._scroll(itx, forward=False)
+
+    @discord.ui.button(emoji="🔽", style=discord.ButtonStyle.secondary)
+    async def scroll_down(self, itx: discord.Interaction, button: discord.ui.Button):
+        await self._scroll(itx, forward=True)
+
+    async def on_timeout(self):
+        if self.message is None:
+            return
+        try:
+            await self.message.edit(view=None)
+        except discord.HTTPException:
+            pass
+
+
 async def setup(bot: Strawberry) -> None:
     await bot.add_cog(Karma(bot))
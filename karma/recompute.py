@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import discord
+
+from .cache import KarmaDelta
+from .database import KarmaRecomputeCheckpoint, KarmaRecomputeMember
+
+# Channels with message history
+HistoryChannel = Union[
+    discord.TextChannel, discord.VoiceChannel, discord.StageChannel, discord.Thread
+]
+
+
+class KarmaRecomputeError(Exception):
+    """Reading history of the channel failed."""
+
+    def __init__(self, channel: HistoryChannel):
+        super().__init__(f"Recompute of channel {channel.id} failed.")
+        self.channel: HistoryChannel = channel
+
+
+class KarmaRecompute:
+    """Rebuild karma of one guild from the history of its channels.
+
+    Reactions are evaluated with the current emoji values the same way
+    the reaction listeners do. Counted karma is written in batches into
+    :class:`KarmaRecomputeMember` together with a checkpoint of the channel,
+    so an interrupted run continues after the last counted message. When
+    every channel is done, :meth:`swap` replaces the guild's karma with the
+    recomputed one in one transaction.
+
+    Text channels, chats of voice and stage channels and all threads,
+    active and archived, including forum posts, are counted. Channels the
+    bot can't read are skipped, their karma is lost by the swap.
+
+    Channels are read concurrently, but at most ``concurrency`` of them
+    at once. When one of them fails, the others are cancelled, so nothing
+    is counted once the run is over.
+    """
+
+    def __init__(
+        self,
+        guild: discord.Guild,
+        get_emoji_value: Callable[
+            [Union[discord.PartialEmoji, discord.Emoji, str]], int
+        ],
+        is_ignored: Callable[[int], bool],
+        concurrency: int,
+        batch_size: int,
+    ):
+        """Prepare the recompute.
+
+        :param guild: Guild to recompute
+        :param get_emoji_value: Returns karma value of the emoji
+        :param is_ignored: Returns True for IDs of channels where karma is ignored
+        :param concurrency: Maximal number of channels read at once
+        :param batch_size: Number of messages counted in one transaction
+        """
+        self.guild: discord.Guild = guild
+        self.get_emoji_value = get_emoji_value
+        self.is_ignored: Callable[[int], bool] = is_ignored
+        self.batch_size: int = batch_size
+        self.message_count: int = 0
+        self.skipped_count: int = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def get_channels(self) -> List[HistoryChannel]:
+        """Get channels and threads whose history is counted.
+
+        Archived threads are not cached, they are listed from the API.
+        Channels the bot can't read are counted in ``skipped_count``.
+        """
+        me: discord.Member = self.guild.me
+        sources: List[HistoryChannel] = [
+            *self.guild.text_channels,
+            *self.guild.voice_channels,
+            *self.guild.stage_channels,
+        ]
+        threads: Dict[int, discord.Thread] = {
+            thread.id: thread for thread in self.guild.threads
+        }
+        for parent in [*self.guild.text_channels, *self.guild.forums]:
+            if self.is_ignored(parent.id):
+                continue
+            permissions: discord.Permissions = parent.permissions_for(me)
+            if not permissions.read_message_history:
+                continue
+            async for thread in parent.archived_threads(limit=None):
+                threads[thread.id] = thread
+            if isinstance(parent, discord.TextChannel) and permissions.manage_threads:
+                async for thread in parent.archived_threads(private=True, limit=None):
+                    threads[thread.id] = thread
+
+        channels: List[HistoryChannel] = []
+        self.skipped_count = 0
+        for channel in sources + list(threads.values()):
+            if self.is_ignored(channel.id):
+                continue
+            if isinstance(channel, discord.Thread) and self.is_ignored(
+                channel.parent_id
+            ):
+                continue
+            if not channel.permissions_for(me).read_message_history:
+                self.skipped_count += 1
+                continue
+            channels.append(channel)
+        return channels
+
+    async def run(self, channels: List[HistoryChannel]):
+        """Count the channels.
+
+        :param channels: Channels from :meth:`get_channels`
+
+        :raises KarmaRecomputeError: History of the channel can't be read.
+        """
+        checkpoints: Dict[int, KarmaRecomputeCheckpoint] = {
+            checkpoint.channel_id: checkpoint
+            for checkpoint in KarmaRecomputeCheckpoint.get_all(self.guild.id)
+        }
+        tasks: Dict[asyncio.Task, HistoryChannel] = {
+            asyncio.ensure_future(
+                self._count_channel(channel, checkpoints.get(channel.id))
+            ): channel
+            for channel in channels
+        }
+        if not tasks:
+            return
+        try:
+            done, _pending = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_EXCEPTION
+            )
+            for task in done:
+                if task.exception() is not None:
+                    raise KarmaRecomputeError(tasks[task]) from task.exception()
+        finally:
+            # Nothing may write into the recompute tables once the run is over
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def swap(self, factor: float) -> int:
+        """Replace karma of the guild with the recomputed one.
+
+        Recomputed karma is treated as received at the time of the swap.
+
+        :param factor: Current factor between karma values and scores
+        :return: Number of karma members of the guild.
+        """
+        return KarmaRecomputeMember.swap(self.guild.id, factor)
+
+    async def _count_channel(
+        self,
+        channel: HistoryChannel,
+        checkpoint: Optional[KarmaRecomputeCheckpoint],
+    ):
+        """Count reactions of all messages in the channel.
+
+        :param channel: Channel to count
+        :param checkpoint: Progress of previous run in the channel
+        """
+        if checkpoint is not None and checkpoint.done:
+            return
+
+        after: Optional[discord.Object] = None
+        if checkpoint is not None and checkpoint.message_id is not None:
+            after = discord.Object(id=checkpoint.message_id)
+
+        async with self._semaphore:
+            deltas: Dict[int, KarmaDelta] = {}
+            last_message_id: Optional[int] = after.id if after else None
+            count: int = 0
+
+            async for message in channel.history(
+                limit=None, after=after, oldest_first=True
+            ):
+                await self._count_message(message, deltas)
+                last_message_id = message.id
+                count += 1
+                if count % self.batch_size == 0:
+                    self._save(channel.id, last_message_id, False, deltas)
+                    deltas = {}
+
+            self._save(channel.id, last_message_id, True, deltas)
+            self.message_count += count
+
+    async def _count_message(
+        self, message: discord.Message, deltas: Dict[int, KarmaDelta]
+    ):
+        """Add karma of the message's reactions to the deltas.
+
+        :param message: Message to count
+        :param deltas: Mapping of user_id to their karma delta
+        """
+        for reaction in message.reactions:
+            emoji_value: int = self.get_emoji_value(reaction.emoji)
+            if emoji_value == 0:
+                continue
+
+            async for user in reaction.users():
+                author = deltas.setdefault(message.author.id, KarmaDelta())
+                author.value += emoji_value
+
+                reactor = deltas.setdefault(user.id, KarmaDelta())
+                if emoji_value > 0:
+                    reactor.given += emoji_value
+                else:
+                    reactor.taken -= emoji_value
+
+    def _save(
+        self,
+        channel_id: int,
+        message_id: Optional[int],
+        done: bool,
+        deltas: Dict[int, KarmaDelta],
+    ):
+        values: Dict[int, Tuple[int, int, int]] = {
+            user_id: (delta.value, delta.given, delta.taken)
+            for user_id, delta in deltas.items()
+        }
+        KarmaRecomputeCheckpoint.save(
+            self.guild.id, channel_id, message_id, done, values
+        )
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+from typing import IO, Iterator, List, Tuple
+
+from .database import KarmaMember
+
+# Supported file formats of karma export and import
+FORMATS: List[str] = ["jsonl", "csv"]
+
+FIELDS: List[str] = ["user_id", "value", "given", "taken"]
+
+
+class KarmaTransferError(Exception):
+    """Line of the imported file is not valid."""
+
+    def __init__(self, line: int):
+        super().__init__(f"Line {line} is not valid.")
+        self.line: int = line
+
+
+async def write_members(guild_id: int, handle: IO[str], format: str) -> int:
+    """Write karma of all members in the guild to the file.
+
+    Members are read from the database in chunks and every chunk is written
+    before the next one is read. The event loop can process other events
+    between the chunks.
+
+    :param guild_id: ID of the guild
+    :param handle: Text file to write to
+    :param format: One of FORMATS
+
+    :return: Number of written members.
+    """
+    count: int = 0
+    writer = csv.writer(handle) if format == "csv" else None
+    if writer is not None:
+        writer.writerow(FIELDS)
+
+    after: int = 0
+    while True:
+        chunk = KarmaMember.get_chunk(guild_id, after)
+        if not chunk:
+            break
+        after = chunk[-1][0]
+
+        if writer is not None:
+            writer.writerows(chunk)
+        else:
+            handle.writelines(
+                json.dumps(dict(zip(FIELDS, row))) + "\n" for row in chunk
+            )
+        count += len(chunk)
+        await asyncio.sleep(0)
+
+    return count
+
+
+def read_members(handle: IO[str], format: str) -> Iterator[Tuple[int, int, int, int]]:
+    """Read karma of members from the file line by line.
+
+    :param handle: Text file to read from
+    :param format: One of FORMATS
+
+    :raises KarmaTransferError: The line can't be parsed.
+
+    :return: Iterator of (user_id, value, given, taken) tuples.
+    """
+    if format == "csv":
+        reader = csv.DictReader(handle)
+        if reader.fieldnames is None or not set(FIELDS) <= set(reader.fieldnames):
+            raise KarmaTransferError(1)
+        records = ((reader.line_num, record) for record in reader)
+    else:
+        records = (
+            (line_num, line)
+            for line_num, line in enumerate(handle, start=1)
+            if line.strip()
+        )
+
+    for line_num, record in records:
+        try:
+            if format != "csv":
+                record = json.loads(record)
+            yield tuple(int(record[field]) for field in FIELDS)
+        except (KeyError, TypeError, ValueError):
+            raise KarmaTransferError(line_num)
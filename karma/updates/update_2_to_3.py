@@ -0,0 +1,84 @@
+"""Add unique (guild_id, user_id) and ranking indexes to karma members.
+
+Duplicate rows of the same member are merged into the oldest one first,
+otherwise the unique index could not be created. The ranking indexes turn
+the position and board queries into index range scans.
+"""
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import column, delete, func, inspect, select, table, update
+
+from pie.database import database
+
+members = table(
+    "boards_karma_members",
+    column("idx"),
+    column("guild_id"),
+    column("user_id"),
+    column("value"),
+    column("given"),
+    column("taken"),
+)
+
+ranking_indexes = {
+    "ix_boards_karma_members_guild_value": ["guild_id", "value", "user_id"],
+    "ix_boards_karma_members_guild_given": ["guild_id", "given", "user_id"],
+    "ix_boards_karma_members_guild_taken": ["guild_id", "taken", "user_id"],
+}
+
+
+def _merge_duplicates(conn):
+    duplicates = conn.execute(
+        select(
+            members.c.guild_id,
+            members.c.user_id,
+            func.min(members.c.idx),
+            func.sum(members.c.value),
+            func.sum(members.c.given),
+            func.sum(members.c.taken),
+        )
+        .group_by(members.c.guild_id, members.c.user_id)
+        .having(func.count(members.c.idx) > 1)
+    ).all()
+
+    for guild_id, user_id, idx, value, given, taken in duplicates:
+        conn.execute(
+            update(members)
+            .where(members.c.idx == idx)
+            .values(value=value, given=given, taken=taken)
+        )
+        conn.execute(
+            delete(members)
+            .where(members.c.guild_id == guild_id)
+            .where(members.c.user_id == user_id)
+            .where(members.c.idx != idx)
+        )
+
+
+def run():
+    inspector = inspect(database.db)
+    with database.db.connect() as conn:
+        mc = MigrationContext.configure(conn)
+        with mc.begin_transaction():
+            ops = Operations(mc)
+
+            karma_indexes = [
+                index["name"] for index in inspector.get_indexes("boards_karma_members")
+            ]
+
+            if "ix_boards_karma_members_guild_user" not in karma_indexes:
+                _merge_duplicates(conn)
+                ops.create_index(
+                    "ix_boards_karma_members_guild_user",
+                    "boards_karma_members",
+                    ["guild_id", "user_id"],
+                    unique=True,
+                )
+
+            for name, columns in ranking_indexes.items():
+                if name not in karma_indexes:
+                    ops.create_index(name, "boards_karma_members", columns)
+
+        # Databases without transactional DDL don't commit the data update
+        conn.commit()
@@ -0,0 +1,60 @@
+"""Add time-decayed score to karma members.
+
+Existing members get the score of their whole value received at the time
+of the migration, so their karma decays from that moment on.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Column, Float, column, inspect, table, update
+
+from pie.database import database
+
+# Must match DECAY_HALF_LIFE and DECAY_EPOCH of the karma module
+DECAY_HALF_LIFE = 90 * 24 * 3600
+DECAY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+members = table(
+    "boards_karma_members",
+    column("value"),
+    column("score"),
+)
+
+
+def run():
+    inspector = inspect(database.db)
+    with database.db.connect() as conn:
+        mc = MigrationContext.configure(conn)
+        with mc.begin_transaction():
+            ops = Operations(mc)
+
+            karma_columns = [
+                column["name"]
+                for column in inspector.get_columns("boards_karma_members")
+            ]
+
+            if "score" not in karma_columns:
+                ops.add_column(
+                    "boards_karma_members",
+                    Column("score", Float, nullable=False, server_default="0"),
+                )
+                factor: float = 2 ** (
+                    (time.time() - DECAY_EPOCH.timestamp()) / DECAY_HALF_LIFE
+                )
+                conn.execute(update(members).values(score=members.c.value * factor))
+
+            karma_indexes = [
+                index["name"] for index in inspector.get_indexes("boards_karma_members")
+            ]
+            if "ix_boards_karma_members_guild_score" not in karma_indexes:
+                ops.create_index(
+                    "ix_boards_karma_members_guild_score",
+                    "boards_karma_members",
+                    ["guild_id", "score", "user_id"],
+                )
+
+        # Databases without transactional DDL don't commit the data update
+        conn.commit()
@@ -445,8 +445,10 @@ class Starboard(commands.Cog):
         if not karma:
             return
 
+        karma.metrics.increment("starboard.duplicate_checks")
         duplicate = await self._check_duplicate(reaction, message)
         if duplicate:
+            karma.metrics.increment("starboard.duplicates")
             return
 
         if message.author_id == reaction.user_id:
@@ -457,8 +459,11 @@ class Starboard(commands.Cog):
         )
 
         if emoji_value == 0:
+            karma.metrics.increment("starboard.zero_value")
             return
 
+        karma.metrics.increment("starboard.proxied")
+
         if added:
             karma.reaction_added(
                 guild_id=reaction.guild_id,
@@ -595,12 +600,18 @@ class Starboard(commands.Cog):
 
         m_reaction: discord.Reaction
 
-        for m_reaction in message.reactions:
+        karma: Karma = self.bot.get_cog("Karma")
+        emoji_values: list[Optional[int]] = []
+        if karma:
+            emoji_values = karma.get_emoji_values(
+                message.guild.id, [m_reaction.emoji for m_reaction in message.reactions]
+            )
+
+        for i, m_reaction in enumerate(message.reactions):
             if m_reaction.count < sb_db_channel.limit:
                 continue
 
-            karma: Karma = self.bot.get_cog("Karma")
-            if karma and karma.get_emoji_value(message.guild.id, m_reaction.emoji) < 1:
+            if karma and (emoji_values[i] or 0) < 1:
                 continue  # If Karma is loaded, count only reactions with positive Karma
 
             await self._repost_message(
@@ -634,6 +645,16 @@ class Starboard(commands.Cog):
         starboard_messages: list[discord.Message] = await self._send_messages(
             channel=sb_channel, message=message
         )
+
+        karma: Karma = self.bot.get_cog("Karma")
+        if karma:
+            # Reposted messages are likely to get more reactions soon
+            karma.message_authors.add(message.id, message.author.id)
+            for starboard_message in starboard_messages:
+                karma.message_authors.add(
+                    starboard_message.id, starboard_message.author.id
+                )
+
         for starboard_message in starboard_messages:
             StarboardMessage.add(
                 guild_id=message.guild.id,